@@ -0,0 +1,265 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from fake_reddit import RATELIMIT_REQUESTS, FakeAccount, FakeReddit, get_multireddit
+
+DOWNLOAD_USERNAME = 'source'
+REPO_DIRECTORY = Path(__file__).resolve().parent.parent
+UPLOAD_USERNAME = 'target'
+
+CONFIG_FILE_CONTENTS = f"""DOWNLOAD_CLIENT_ID = 'benchmark'
+DOWNLOAD_CLIENT_SECRET = 'benchmark'
+DOWNLOAD_USERNAME = '{DOWNLOAD_USERNAME}'
+DOWNLOAD_PASSWORD = 'benchmark'
+UPLOAD_CLIENT_ID = 'benchmark'
+UPLOAD_CLIENT_SECRET = 'benchmark'
+UPLOAD_USERNAME = '{UPLOAD_USERNAME}'
+UPLOAD_PASSWORD = 'benchmark'
+"""
+LAUNCHER_SOURCE = """
+import json, os, subprocess, sys, time
+start = time.perf_counter()
+process = subprocess.Popen(sys.argv[1:], stdout=subprocess.DEVNULL)
+_, status, resource_usage = os.wait4(process.pid, 0)
+elapsed_seconds = time.perf_counter() - start
+# ru_maxrss is in kibibytes on Linux and in bytes on macOS
+peak_rss_bytes = resource_usage.ru_maxrss if sys.platform == 'darwin' else resource_usage.ru_maxrss * 1024
+print(json.dumps([os.waitstatus_to_exitcode(status), elapsed_seconds, peak_rss_bytes]))
+"""
+PHASE_ARGUMENTS = {
+    'download': ['-d', '-is', '-o'],
+    'download-incremental': ['-d', '-in', '-is', '-o'],
+    'download-remindmebot-reminders': ['-d', '-ir', '-o', '-sb', '-sm', '-ss'],
+    'download-sequential': ['-c', '1', '-d', '-is', '-o'],
+    'download-upload': ['-d', '-o', '-u'],
+    'plan': ['-is', '-p', '-sy'],
+    'saved-resources': ['-d', '-is', '-o', '-sb', '-sm', '-ss'],
+    'transfer': ['-d', '-o', '-st', '-u'],
+    'upload': ['-o', '-u'],
+    'upload-remindmebot-reminders': ['-ir', '-o', '-sb', '-sm', '-ss', '-u'],
+    'upload-saved-resources': ['-c', '1', '-is', '-o', '-sb', '-sm', '-ss', '-u'],
+    'upload-saved-resources-concurrent': ['-is', '-o', '-sb', '-sm', '-ss', '-u'],
+    'upload-multireddits-merge': ['-mm', '-o', '-sb', '-ss', '-u'],
+    'upload-subreddits': ['-o', '-sb', '-sm', '-u'],
+    'upload-sync': ['-o', '-sy', '-u'],
+}
+
+
+def get_accounts(args):
+    """Return the source account and the target accounts, with each target already holding the overlapping share of the source's resources.
+
+    Keyword arguments:
+    args -- the parsed command line arguments
+    """
+    source_account = FakeAccount(
+        DOWNLOAD_USERNAME,
+        blocked_user_count=args.blocked_users,
+        multireddit_count=args.multireddits,
+        remindmebot_reminder_count=args.remindmebot_reminders,
+        saved_resource_count=args.saved_resources,
+        subreddit_count=args.subreddits,
+    )
+    target_accounts = []
+    for target_username in get_target_usernames(args):
+        target_account = FakeAccount(target_username)
+        target_account.blocked_users = source_account.blocked_users[:int(args.blocked_users * args.target_overlap)]
+        target_account.multireddits = [
+            # The target's copies lack the last subreddit, as if it was added to the source's multireddits after the last migration
+            get_multireddit(multireddit['data']['name'], target_username, [subreddit['name'] for subreddit in multireddit['data']['subreddits'][:-1]])
+            for multireddit in source_account.multireddits[:int(args.multireddits * args.target_overlap)]
+        ]
+        target_account.subreddits = source_account.subreddits[:int(args.subreddits * args.target_overlap)]
+        target_account.subreddit_names = {subreddit['data']['display_name'].lower() for subreddit in target_account.subreddits}
+        target_accounts.append(target_account)
+    return (source_account, target_accounts)
+
+
+def get_config_file_contents(args):
+    """Return the config.py of the benchmark, listing every target account in UPLOAD_ACCOUNTS when there are several.
+
+    Keyword arguments:
+    args -- the parsed command line arguments
+    """
+    if args.target_accounts == 1:
+        return CONFIG_FILE_CONTENTS
+    upload_accounts = [
+        {'client_id': 'benchmark', 'client_secret': 'benchmark', 'password': 'benchmark', 'username': target_username}
+        for target_username in get_target_usernames(args)
+    ]
+    return f'{CONFIG_FILE_CONTENTS}UPLOAD_ACCOUNTS = {upload_accounts!r}\n'
+
+
+def get_item_count(phase, args):
+    """Return the number of items that the phase migrates.
+
+    Keyword arguments:
+    phase -- the benchmarked phase
+    args -- the parsed command line arguments
+    """
+    if 'saved-resources' in phase:
+        return args.saved_resources
+    if 'remindmebot-reminders' in phase:
+        return args.remindmebot_reminders
+    if 'multireddits' in phase:
+        return args.multireddits
+    if phase == 'upload-subreddits':
+        return args.subreddits
+    if phase.startswith('upload') or phase in ('download-upload', 'transfer'):
+        return args.blocked_users + args.multireddits + args.subreddits
+    return args.blocked_users + args.multireddits + args.saved_resources + args.subreddits
+
+
+def get_target_usernames(args):
+    """Return the usernames of the target accounts.
+
+    Keyword arguments:
+    args -- the parsed command line arguments
+    """
+    return [UPLOAD_USERNAME] + [f'{UPLOAD_USERNAME}{account_number}' for account_number in range(2, args.target_accounts + 1)]
+
+
+def print_results(phase, run_result, fake_reddit, item_count):
+    """Print the request counts, wall time and peak memory of a benchmark run.
+
+    Keyword arguments:
+    phase -- the benchmarked phase
+    run_result -- the (exit code, wall time in seconds, peak RSS in bytes) of the run
+    fake_reddit -- the FakeReddit instance the run talked to
+    item_count -- the number of items in the benchmarked phase
+    """
+    exit_code, elapsed_seconds, peak_rss_bytes = run_result
+    total_requests = sum(fake_reddit.request_counts.values())
+    print(f'\nPhase: {phase} ({item_count} items)')
+    for route, count in sorted(fake_reddit.request_counts.items()):
+        print(f'  {count:>8}  {route}')
+    print(f'Total requests: {total_requests}')
+    print(f'Injected errors: {fake_reddit.injected_error_count}')
+    print(f'Requests per 1,000 items: {total_requests * 1000 / max(item_count, 1):.1f}')
+    print(f'Wall time: {elapsed_seconds:.2f}s')
+    print(f'Peak RSS: {peak_rss_bytes / 2 ** 20:.1f} MiB')
+    if exit_code:
+        print(f'Failed with exit code {exit_code}')
+
+
+def run_main(arguments, fake_reddit, working_directory, main_path, config_file_contents):
+    """Run main.py against the fake Reddit server and return its exit code, wall time in seconds and peak RSS in bytes.
+
+    Keyword arguments:
+    arguments -- the command line arguments to pass to main.py
+    fake_reddit -- the running FakeReddit instance
+    working_directory -- the directory to run main.py in
+    main_path -- the path of the main.py to run
+    config_file_contents -- the contents of the config.py to run main.py with
+    """
+    shutil.copy(main_path, working_directory / 'main.py')
+    (working_directory / 'config.py').write_text(config_file_contents)
+    (working_directory / 'praw.ini').write_text(
+        '[DEFAULT]\n'
+        'check_for_updates=False\n'
+        f'oauth_url={fake_reddit.url}\n'
+        f'reddit_url={fake_reddit.url}\n'
+    )
+    # main.py is started by a fresh launcher process, as a child forked straight from this process would report this process's peak RSS as its own
+    launcher_output = subprocess.run(
+        [sys.executable, '-c', LAUNCHER_SOURCE, sys.executable, 'main.py', *arguments],
+        stdout=subprocess.PIPE,
+        check=True,
+        cwd=working_directory,
+        env=os.environ,
+        text=True,
+    ).stdout
+    return tuple(json.loads(launcher_output))
+
+
+def write_data_files(account, working_directory):
+    """Write the data files that upload phases read, as if the account had been downloaded.
+
+    Keyword arguments:
+    account -- the FakeAccount to write the data of
+    working_directory -- the directory main.py runs in
+    """
+    data_directory = working_directory / 'data'
+    data_directory.mkdir()
+    (data_directory / 'blocked-users.json').write_text(json.dumps({'blockedUsers': account.blocked_users}))
+    (data_directory / 'multireddits.json').write_text(json.dumps({'multireddits': [
+        {
+            'displayName': multireddit['data']['display_name'],
+            'subreddits': [subreddit['name'] for subreddit in multireddit['data']['subreddits']],
+            'visibility': multireddit['data']['visibility'],
+        }
+        for multireddit in account.multireddits
+    ]}))
+    (data_directory / 'remindmebot-reminders.json').write_text(json.dumps({'remindmebotReminders': account.remindmebot_reminders}))
+    (data_directory / 'saved-resources.json').write_text(json.dumps({'savedResources': [
+        {
+            'authorName': saved_resource['data']['author'],
+            'fullname': saved_resource['data']['name'],
+            'permalink': saved_resource['data']['permalink'],
+            'savedResourceType': 'comment' if saved_resource['kind'] == 't1' else 'submission',
+            'title': saved_resource['data'].get('title'),
+        }
+        for saved_resource in account.saved_resources
+    ]}))
+    (data_directory / 'subreddits.json').write_text(json.dumps({'subreddits': [
+        {
+            'displayName': subreddit['data']['display_name'],
+            'isQuarantined': subreddit['data']['quarantine'],
+            'subredditType': subreddit['data']['subreddit_type'],
+        }
+        for subreddit in account.subreddits
+    ]}))
+
+
+parser = argparse.ArgumentParser(description='Benchmark main.py against a local fake Reddit server')
+parser.add_argument('-b', '--blocked-users', default=100, type=int, help='The number of blocked users on the source account')
+parser.add_argument('-e', '--error-rate', default=0, type=float, help='The share (0 to 1) of API requests that the fake Reddit server fails with the error status')
+parser.add_argument('-es', '--error-status', choices=[429, 500, 502, 503, 504], default=503, type=int, help='The HTTP status of the injected failures (default 503)')
+parser.add_argument('-l', '--latency', default=0, type=float, help='The seconds the fake Reddit server waits before answering each request')
+parser.add_argument('-ma', '--main', default=REPO_DIRECTORY / 'main.py', type=Path, help='The main.py to benchmark, e.g., one exported from an older commit')
+parser.add_argument('-mi', '--missing-subreddits', default=0, type=int, help="The number of source subreddits that Reddit can't find, as if they were banned or deleted, which the upload skips before subscribing")
+parser.add_argument('-m', '--multireddits', default=10, type=int, help='The number of multireddits on the source account')
+parser.add_argument('-p', '--phase', choices=sorted(PHASE_ARGUMENTS), default=['saved-resources'], nargs='+', help='The phases to benchmark, one run each')
+parser.add_argument('-r', '--remindmebot-reminders', default=10, type=int, help='The number of RemindMeBot reminders on the source account')
+parser.add_argument('-rj', '--rejected-subreddits', default=0, type=int, help='The number of source subreddits that Reddit finds but fails to subscribe to, as if they were banned after being checked, which makes the upload split its batches')
+parser.add_argument('-rl', '--rate-limit', default=RATELIMIT_REQUESTS, type=int, help='The number of requests the fake Reddit server allows per rate-limit window before answering with 429, where Reddit allows 600 (default effectively unlimited)')
+parser.add_argument('-rw', '--rate-limit-window', default=600, type=int, help='The seconds in a rate-limit window of the fake Reddit server (default 600)')
+parser.add_argument('-s', '--saved-resources', default=1000, type=int, help='The number of saved resources on the source account')
+parser.add_argument('-se', '--seed', default=0, type=int, help='The seed of the injected failures')
+parser.add_argument('-sr', '--subreddits', default=1000, type=int, help='The number of subreddits on the source account')
+parser.add_argument('-t', '--target-overlap', default=0, type=float, help="The share (0 to 1) of the source account's blocked users, multireddits and subreddits that the target account already has")
+parser.add_argument('-ta', '--target-accounts', default=1, type=int, help='The number of target accounts to upload to at the same time')
+args = parser.parse_args()
+
+for phase in args.phase:
+    # Start every phase from the same state, as uploads change the target account
+    source_account, target_accounts = get_accounts(args)
+    missing_subreddit_names = [subreddit['data']['display_name'] for subreddit in source_account.subreddits[::max(args.subreddits // max(args.missing_subreddits, 1), 1)][:args.missing_subreddits]]
+    # Start one subreddit later, so that the rejected subreddits aren't missing ones
+    rejected_subreddit_names = [subreddit['data']['display_name'] for subreddit in source_account.subreddits[1::max(args.subreddits // max(args.rejected_subreddits, 1), 1)][:args.rejected_subreddits]]
+    fake_reddit = FakeReddit(
+        [source_account, *target_accounts],
+        args.latency,
+        missing_subreddit_names,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        ratelimit_requests=args.rate_limit,
+        ratelimit_window_seconds=args.rate_limit_window,
+        rejected_subreddit_names=rejected_subreddit_names,
+        seed=args.seed,
+    ).start()
+    try:
+        with tempfile.TemporaryDirectory() as working_directory:
+            working_directory = Path(working_directory)
+            # Incremental downloads start from the archive of an earlier download, which already has everything on the source account
+            if '-in' in PHASE_ARGUMENTS[phase] or (('-p' in PHASE_ARGUMENTS[phase] or '-u' in PHASE_ARGUMENTS[phase]) and '-d' not in PHASE_ARGUMENTS[phase]):
+                write_data_files(source_account, working_directory)
+            run_result = run_main(PHASE_ARGUMENTS[phase], fake_reddit, working_directory, args.main, get_config_file_contents(args))
+    finally:
+        fake_reddit.stop()
+    print_results(phase, run_result, fake_reddit, get_item_count(phase, args))
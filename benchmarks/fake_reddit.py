@@ -0,0 +1,493 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import json
+import random
+import re
+import threading
+import time
+
+COMMENT_KIND = 't1'
+LISTING_KIND = 'Listing'
+MESSAGE_KIND = 't4'
+# Far above Reddit's 600 requests per window, so that benchmarks measure main.py instead of the rate limit unless they ask for one
+RATELIMIT_REQUESTS = 10 ** 6
+RATELIMIT_WINDOW_SECONDS = 600
+REMINDMEBOT_MESSAGE_BODY = 'MyReminders!'
+REMINDMEBOT_USERNAME = 'RemindMeBot'
+SUBMISSION_KIND = 't3'
+SUBREDDIT_KIND = 't5'
+
+
+class FakeAccount:
+    """A synthetic Reddit account served by FakeReddit."""
+
+    def __init__(self, name, blocked_user_count=0, multireddit_count=0, remindmebot_reminder_count=0, saved_resource_count=0, subreddit_count=0):
+        """Create a synthetic account.
+
+        Keyword arguments:
+        name -- the account username
+        blocked_user_count -- the number of blocked users to generate (default 0)
+        multireddit_count -- the number of multireddits to generate, each with a few of the account's subreddits (default 0)
+        remindmebot_reminder_count -- the number of RemindMeBot reminders that RemindMeBot lists for the account (default 0)
+        saved_resource_count -- the number of saved resources to generate, alternating between comments and submissions (default 0)
+        subreddit_count -- the number of subscribed subreddits to generate (default 0)
+        """
+        self.name = name
+        self.blocked_users = [f'blocked{index:x}' for index in range(blocked_user_count)]
+        self.message_threads = []
+        self.remindmebot_reminders = [
+            {'datetime': f'{2030 + index // 365}-01-01 00:00:00 UTC', 'source': f'https://www.reddit.com/r/test/comments/r{index:x}/post/'}
+            for index in range(remindmebot_reminder_count)
+        ]
+        self.subreddits = [get_subreddit(f'sub{index:x}') for index in range(subreddit_count)]
+        self.multireddits = [
+            get_multireddit(f'multi{index:x}', name, [subreddit['data']['display_name'] for subreddit in self.subreddits[index:index + 5]])
+            for index in range(multireddit_count)
+        ]
+        self.saved_resources = []
+        self.subreddit_names = {subreddit['data']['display_name'].lower() for subreddit in self.subreddits}
+        self.things = {}
+        for index in range(saved_resource_count):
+            # Every few saved comments share a submission so that title lookups can be deduplicated
+            submission_id = f's{index // 4:x}'
+            if index % 2:
+                self.saved_resources.append(get_comment(f'c{index:x}', submission_id, name))
+                self.add_thing(get_submission(submission_id, name))
+            else:
+                self.saved_resources.append(get_submission(f'{submission_id}x{index:x}', name))
+            self.add_thing(self.saved_resources[-1])
+
+    def add_thing(self, thing):
+        """Make the thing resolvable by its fullname."""
+        self.things[thing['data']['name']] = thing
+
+
+class FakeReddit:
+    """A local HTTP stand-in for the Reddit API endpoints that main.py uses."""
+
+    def __init__(
+        self,
+        accounts,
+        latency_seconds=0,
+        missing_subreddit_names=(),
+        error_rate=0,
+        error_status=503,
+        ratelimit_requests=RATELIMIT_REQUESTS,
+        ratelimit_window_seconds=RATELIMIT_WINDOW_SECONDS,
+        rejected_subreddit_names=(),
+        remindmebot_reply_delay_seconds=1,
+        seed=0,
+    ):
+        """Create the fake Reddit server state.
+
+        Keyword arguments:
+        accounts -- the FakeAccount instances to serve
+        latency_seconds -- the time to wait before answering each request (default 0)
+        missing_subreddit_names -- the names of subreddits that can't be found or subscribed to, as if they were banned or deleted (default ())
+        error_rate -- the share (0 to 1) of API requests that fail with the error status instead of being answered (default 0)
+        error_status -- the HTTP status of the injected failures, e.g., 429 or 503 (default 503)
+        ratelimit_requests -- the number of requests allowed per rate-limit window, after which requests fail with 429 until the window resets (default RATELIMIT_REQUESTS)
+        ratelimit_window_seconds -- the length of a rate-limit window (default 600)
+        rejected_subreddit_names -- the names of subreddits that can be found but not subscribed to, as if they were banned after being checked (default ())
+        remindmebot_reply_delay_seconds -- the time RemindMeBot takes to reply to a message (default 1)
+        seed -- the seed of the random failures, so that runs can be repeated (default 0)
+        """
+        self.accounts = {account.name: account for account in accounts}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.injected_error_count = 0
+        self.latency_seconds = latency_seconds
+        self.missing_subreddit_names = set(missing_subreddit_names)
+        self.random = random.Random(seed)
+        self.ratelimit_requests = ratelimit_requests
+        self.ratelimit_used = 0
+        self.ratelimit_window_seconds = ratelimit_window_seconds
+        self.ratelimit_window_start = time.monotonic()
+        self.rejected_subreddit_names = set(rejected_subreddit_names)
+        self.remindmebot_reply_delay_seconds = remindmebot_reply_delay_seconds
+        self.subreddits = {
+            subreddit['data']['display_name'].lower(): subreddit
+            for account in accounts
+            for subreddit in account.subreddits
+            if subreddit['data']['display_name'] not in self.missing_subreddit_names
+        }
+        self.lock = threading.Lock()
+        self.request_counts = Counter()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        """Return the base URL of the running server."""
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def count_request(self, route, is_rate_limited=True):
+        """Count a request against the given route and the rate limit, and return the status of the failure to inject, or None to answer it.
+
+        Keyword arguments:
+        route -- the label of the route
+        is_rate_limited -- whether or not the request counts against the rate limit and can fail (default True)
+        """
+        with self.lock:
+            self.request_counts[route] += 1
+            if not is_rate_limited:
+                return None
+            if time.monotonic() - self.ratelimit_window_start >= self.ratelimit_window_seconds:
+                self.ratelimit_used = 0
+                self.ratelimit_window_start = time.monotonic()
+            self.ratelimit_used += 1
+            if self.ratelimit_used > self.ratelimit_requests:
+                error_status = 429
+            elif self.random.random() < self.error_rate:
+                error_status = self.error_status
+            else:
+                return None
+            self.injected_error_count += 1
+            return error_status
+
+    def get_ratelimit_headers(self):
+        """Return the Reddit rate-limit headers of the current window."""
+        with self.lock:
+            return {
+                'x-ratelimit-remaining': str(max(self.ratelimit_requests - self.ratelimit_used, 0)),
+                'x-ratelimit-reset': str(max(int(self.ratelimit_window_seconds - (time.monotonic() - self.ratelimit_window_start)), 0)),
+                'x-ratelimit-used': str(self.ratelimit_used),
+            }
+
+    def get_thing(self, fullname):
+        """Return the thing with the given fullname from any account, or None if it doesn't exist."""
+        for account in self.accounts.values():
+            if fullname in account.things:
+                return account.things[fullname]
+        return None
+
+    def reset_request_counts(self):
+        """Reset the request counters."""
+        with self.lock:
+            self.injected_error_count = 0
+            self.request_counts.clear()
+
+    def start(self):
+        """Start serving on a free local port in a background thread."""
+        fake_reddit = self
+
+        class Handler(FakeRedditRequestHandler):
+            pass
+
+        Handler.fake_reddit = fake_reddit
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeRedditRequestHandler(BaseHTTPRequestHandler):
+    """Route requests to the handler methods for each Reddit API endpoint."""
+
+    disable_nagle_algorithm = True
+    fake_reddit = None
+    protocol_version = 'HTTP/1.1'
+    routes = (
+        ('POST', '/api/v1/access_token', 'handle_access_token'),
+        ('GET', '/api/v1/me', 'handle_me'),
+        ('POST', '/api/block_user', 'handle_block_user'),
+        ('POST', '/api/compose', 'handle_compose'),
+        ('GET', '/api/info', 'handle_info'),
+        ('POST', '/api/multi', 'handle_create_multireddit'),
+        ('GET', '/api/multi/mine', 'handle_my_multireddits'),
+        ('PUT', '/api/multi/user/{name}/m/{multi}', 'handle_update_multireddit'),
+        ('POST', '/api/save', 'handle_save'),
+        ('POST', '/api/subscribe', 'handle_subscribe'),
+        ('GET', '/comments/{id}', 'handle_comments'),
+        ('GET', '/message/messages', 'handle_messages'),
+        ('GET', '/prefs/blocked', 'handle_blocked'),
+        ('GET', '/subreddits/mine/subscriber', 'handle_my_subreddits'),
+        ('GET', '/user/{name}/about', 'handle_user_about'),
+        ('GET', '/user/{name}/saved', 'handle_saved'),
+    )
+    wbufsize = -1
+
+    def do_GET(self):
+        self.route('GET')
+
+    def do_POST(self):
+        self.route('POST')
+
+    def do_PUT(self):
+        self.route('PUT')
+
+    def get_account(self):
+        """Return the account that the bearer token belongs to."""
+        token = self.headers.get('Authorization', '').split(' ')[-1]
+        return self.fake_reddit.accounts.get(token.replace('token-', '', 1))
+
+    def handle_access_token(self, match, query, form):
+        self.send_json({
+            'access_token': f"token-{form['username'][0]}",
+            'expires_in': 3600,
+            'scope': '*',
+            'token_type': 'bearer',
+        })
+
+    def handle_block_user(self, match, query, form):
+        account = self.get_account()
+        name = query['account_id'][0].split('_', 1)[1]
+        if name not in account.blocked_users:
+            account.blocked_users.append(name)
+        self.send_json({})
+
+    def handle_blocked(self, match, query, form):
+        self.send_json({
+            'kind': 'UserList',
+            'data': {
+                'children': [{'date': 0.0, 'id': f't2_{name}', 'name': name} for name in self.get_account().blocked_users],
+            },
+        })
+
+    def handle_comments(self, match, query, form):
+        submission = self.fake_reddit.get_thing(f"{SUBMISSION_KIND}_{match['id']}")
+        if not submission:
+            self.send_json({'error': 404}, 404)
+            return
+        self.send_json([get_listing([submission]), get_listing([])])
+
+    def handle_compose(self, match, query, form):
+        account = self.get_account()
+        recipient = form['to'][0]
+        message = get_message(f'm{len(account.message_threads):x}', account.name, recipient, form['subject'][0], form['text'][0])
+        reply = None
+        if recipient == REMINDMEBOT_USERNAME and form['text'][0] == REMINDMEBOT_MESSAGE_BODY:
+            reply = get_message(f'm{len(account.message_threads):x}r', REMINDMEBOT_USERNAME, account.name, f"re: {form['subject'][0]}", get_remindmebot_reply_body(account.remindmebot_reminders))
+            reply['data']['created_utc'] += self.fake_reddit.remindmebot_reply_delay_seconds
+        elif recipient == REMINDMEBOT_USERNAME and form['text'][0].startswith('RemindMe!'):
+            account.remindmebot_reminders.append({'datetime': form['text'][0].split('!', 1)[1].split('"')[0].strip(), 'source': form['text'][0].split('"')[1]})
+        account.message_threads.append((message, reply))
+        self.send_json({'json': {'errors': []}})
+
+    def handle_create_multireddit(self, match, query, form):
+        account = self.get_account()
+        model = json.loads(form['model'][0])
+        multireddit = get_multireddit(model['display_name'], account.name, [subreddit['name'] for subreddit in model['subreddits']])
+        account.multireddits.append(multireddit)
+        self.send_json(multireddit)
+
+    def handle_info(self, match, query, form):
+        if 'sr_name' in query:
+            subreddit_names = query['sr_name'][0].split(',')
+            things = [self.fake_reddit.subreddits.get(subreddit_name.lower()) for subreddit_name in subreddit_names[:100]]
+        else:
+            fullnames = query.get('id', [''])[0].split(',')
+            things = [self.fake_reddit.get_thing(fullname) for fullname in fullnames[:100]]
+        self.send_json(get_listing([thing for thing in things if thing]))
+
+    def handle_me(self, match, query, form):
+        account = self.get_account()
+        self.send_json({'id': account.name, 'name': account.name})
+
+    def handle_messages(self, match, query, form):
+        # Threads show their replies once they've been sent, like a real inbox
+        threads = []
+        for message, reply in reversed(self.get_account().message_threads):
+            thread = {'kind': MESSAGE_KIND, 'data': dict(message['data'])}
+            if reply and reply['data']['created_utc'] <= time.time():
+                thread['data']['replies'] = get_listing([reply])
+            threads.append(thread)
+        self.send_listing_page(threads, query)
+
+    def handle_my_multireddits(self, match, query, form):
+        self.send_json(self.get_account().multireddits)
+
+    def handle_my_subreddits(self, match, query, form):
+        self.send_listing_page(self.get_account().subreddits, query)
+
+    def handle_save(self, match, query, form):
+        account = self.get_account()
+        thing = self.fake_reddit.get_thing(form['id'][0])
+        if not thing:
+            self.send_json({'error': 404, 'message': 'Not Found'}, 404)
+            return
+        # Reddit lists the most recently saved resource first
+        account.saved_resources = [saved_resource for saved_resource in account.saved_resources if saved_resource is not thing]
+        account.saved_resources.insert(0, thing)
+        self.send_json({})
+
+    def handle_saved(self, match, query, form):
+        self.send_listing_page(self.fake_reddit.accounts[match['name']].saved_resources, query)
+
+    def handle_subscribe(self, match, query, form):
+        subreddit_names = form['sr_name'][0].split(',')
+        if (self.fake_reddit.missing_subreddit_names | self.fake_reddit.rejected_subreddit_names).intersection(subreddit_names):
+            self.send_json({'error': 404, 'message': 'Not Found'}, 404)
+            return
+        account = self.get_account()
+        for subreddit_name in subreddit_names:
+            if subreddit_name.lower() not in account.subreddit_names:
+                account.subreddit_names.add(subreddit_name.lower())
+                account.subreddits.append(self.fake_reddit.subreddits.get(subreddit_name.lower(), get_subreddit(subreddit_name)))
+        self.send_json({})
+
+    def handle_update_multireddit(self, match, query, form):
+        account = self.get_account()
+        model = json.loads(form['model'][0])
+        for index, multireddit in enumerate(account.multireddits):
+            if multireddit['data']['name'].lower() == match['multi'].lower():
+                account.multireddits[index] = get_multireddit(multireddit['data']['name'], account.name, [subreddit['name'] for subreddit in model['subreddits']])
+                self.send_json(account.multireddits[index])
+                return
+        self.send_json({'error': 404, 'path': self.path}, 404)
+
+    def handle_user_about(self, match, query, form):
+        self.send_json({'kind': 't2', 'data': {'id': match['name'], 'name': match['name']}})
+
+    def log_message(self, format, *args):
+        pass
+
+    def route(self, method):
+        """Dispatch the request to the first matching route."""
+        parsed_url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode()) if length else {}
+        for route_method, path_template, handler_name in self.routes:
+            match = re.fullmatch(re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', path_template), parsed_url.path.rstrip('/'))
+            if route_method == method and match:
+                # Token requests go to www.reddit.com, which isn't rate limited like the API
+                error_status = self.fake_reddit.count_request(f'{method} {path_template}', path_template != '/api/v1/access_token')
+                time.sleep(self.fake_reddit.latency_seconds)
+                if error_status:
+                    self.send_json({'error': error_status, 'message': 'Injected failure'}, error_status)
+                    return
+                if path_template != '/api/v1/access_token' and not self.get_account():
+                    self.send_json({'error': 401, 'message': 'Unauthorized'}, 401)
+                    return
+                getattr(self, handler_name)(match, parse_qs(parsed_url.query), form)
+                return
+        self.fake_reddit.count_request(f'{method} unknown')
+        self.send_json({'error': 404, 'path': parsed_url.path}, 404)
+
+    def send_json(self, body, status=200):
+        """Send a JSON response with Reddit-style rate-limit headers."""
+        encoded_body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded_body)))
+        for header, value in self.fake_reddit.get_ratelimit_headers().items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(encoded_body)
+
+    def send_listing_page(self, things, query):
+        """Send one page of a listing, honouring the limit and after parameters."""
+        limit = min(int(query.get('limit', ['25'])[0]), 100)
+        after = query.get('after', [None])[0]
+        start = 0
+        if after:
+            fullnames = [thing['data']['name'] for thing in things]
+            start = fullnames.index(after) + 1 if after in fullnames else len(things)
+        page = things[start:start + limit]
+        next_after = page[-1]['data']['name'] if page and start + limit < len(things) else None
+        self.send_json(get_listing(page, next_after))
+
+
+def get_comment(comment_id, submission_id, author):
+    """Return a synthetic comment thing."""
+    return {
+        'kind': COMMENT_KIND,
+        'data': {
+            'author': author,
+            'body': f'Comment {comment_id}',
+            'id': comment_id,
+            'link_id': f'{SUBMISSION_KIND}_{submission_id}',
+            'name': f'{COMMENT_KIND}_{comment_id}',
+            'parent_id': f'{SUBMISSION_KIND}_{submission_id}',
+            'permalink': f'/r/test/comments/{submission_id}/post/{comment_id}/',
+            'subreddit': 'test',
+        },
+    }
+
+
+def get_listing(things, after=None):
+    """Return a listing wrapping the given things."""
+    return {
+        'kind': LISTING_KIND,
+        'data': {
+            'after': after,
+            'before': None,
+            'children': things,
+            'dist': len(things),
+        },
+    }
+
+
+def get_message(message_id, author, recipient, subject, body):
+    """Return a synthetic private message."""
+    return {
+        'kind': MESSAGE_KIND,
+        'data': {
+            'author': author,
+            'body': body,
+            'created_utc': time.time(),
+            'dest': recipient,
+            'id': message_id,
+            'name': f'{MESSAGE_KIND}_{message_id}',
+            'replies': '',
+            'subject': subject,
+            'subreddit': None,
+        },
+    }
+
+
+def get_multireddit(name, author, subreddit_names):
+    """Return a synthetic multireddit."""
+    return {
+        'kind': 'LabeledMulti',
+        'data': {
+            'display_name': name,
+            'name': name,
+            'path': f'/user/{author}/m/{name}',
+            'subreddits': [{'name': subreddit_name} for subreddit_name in subreddit_names],
+            'visibility': 'private',
+        },
+    }
+
+
+def get_remindmebot_reply_body(remindmebot_reminders):
+    """Return a RemindMeBot reply that lists the reminders in its table format."""
+    lines = ['Hello, here is a list of your current reminders', '', '|Source|Message|Date|Remove|', '|-|-|-|:-:|']
+    for remindmebot_reminder in remindmebot_reminders:
+        lines.append(f"|[Source]({remindmebot_reminder['source']})||**{remindmebot_reminder['datetime']}**|[[X]](https://www.reddit.com/message/compose/)|")
+    return '\n'.join(lines)
+
+
+def get_submission(submission_id, author):
+    """Return a synthetic submission thing."""
+    return {
+        'kind': SUBMISSION_KIND,
+        'data': {
+            'author': author,
+            'id': submission_id,
+            'name': f'{SUBMISSION_KIND}_{submission_id}',
+            'permalink': f'/r/test/comments/{submission_id}/post/',
+            'subreddit': 'test',
+            'title': f'Submission {submission_id}',
+        },
+    }
+
+
+def get_subreddit(display_name):
+    """Return a synthetic public subreddit."""
+    return {
+        'kind': SUBREDDIT_KIND,
+        'data': {
+            'display_name': display_name,
+            'id': display_name,
+            'name': f'{SUBREDDIT_KIND}_{display_name}',
+            'quarantine': False,
+            'subreddit_type': 'public',
+        },
+    }
@@ -1,173 +1,1969 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
 from os.path import exists
 from pathlib import Path
+from urllib.parse import urlparse
 import argparse
 import datetime
 import getpass
+import gzip
+import importlib.util
 import json
+import os
+import queue
+import re
+import sqlite3
 import sys
+import threading
 import time
 
-from praw.models import Comment, Submission
-import praw
-import prawcore
-
-import config
-
+ARCHIVE_DATABASE_FILENAME = 'archive.sqlite3'
+ARCHIVE_DATABASE_TIMEOUT_SECONDS = 30
+BLOCKED_USERS_FILENAME = 'blocked-users.json'
 BLOCKED_USERS_KEY = 'blockedUsers'
+CHANGES_FILENAME = 'changes.jsonl'
+CHECKED_TIMESTAMP_KEY = 'checkedTimestamp'
+COMMENT_FULLNAME_PREFIX = 't1_'
+CURSOR_KEY = 'cursor'
 DATA_DIRECTORY_NAME = 'data'
 DATETIME_KEY = 'datetime'
+DEFAULT_CONCURRENCY = 4
+DELETED_TEXTS = ('[deleted]', '[removed]')
 DISPLAY_NAME_KEY = 'displayName'
+DOWNLOADED_EVENT = 'downloaded'
+DOWNLOAD_COMPLETED_EVENT = 'downloadCompleted'
+DOWNLOAD_RESTARTED_EVENT = 'downloadRestarted'
 DOWNLOAD_PASSWORD_VARIABLE_NAME = 'DOWNLOAD_PASSWORD'
 DOWNLOAD_USERNAME_VARIABLE_NAME = 'DOWNLOAD_USERNAME'
+EVENT_KEY = 'event'
+EXISTS_KEY = 'exists'
 FOUND_ACCOUNT_CREDENTIALS_MESSAGE = 'Found Reddit account credentials from config.py'
+FULLNAME_KEY = 'fullname'
 GET_ACCOUNT_CREDENTIALS_MESSAGE_PREFIX = '\nEnter Reddit account credentials for '
+GZIP_COMPRESSION = 'gzip'
 IS_QUARANTINED_KEY = 'isQuarantined'
+ITEMS_KEY = 'items'
+ITEM_KEY = 'item'
+JOURNAL_FILENAME = 'journal.jsonl'
+JOURNAL_FSYNC_INTERVAL_SECONDS = 5
+JSONL_FORMAT = 'jsonl'
+JSON_FORMAT = 'json'
+MULTIREDDITS_FILENAME = 'multireddits.json'
 MULTIREDDITS_KEY = 'multireddits'
+NO_COMPRESSION = 'none'
+OTHER_REPORT_PHASE = 'other'
+PARTIAL_FILENAME_PREFIX = 'partial-'
+PHASE_KEY = 'phase'
+PROGRESS_LOG_INTERVAL_SECONDS = 10
+PROGRESS_RENDER_INTERVAL_SECONDS = 0.2
+RATE_LIMIT_WINDOW_SECONDS = 10 * 60
+REMINDMEBOT_INBOX_MESSAGE_LIMIT = 25
 REMINDMEBOT_MESSAGE_BODY = 'MyReminders!'
 REMINDMEBOT_MESSAGE_SUBJECT = 'RemindMe'
+REMINDMEBOT_REMINDERS_FILENAME = 'remindmebot-reminders.json'
 REMINDMEBOT_REMINDERS_KEY = 'remindmebotReminders'
+REMINDMEBOT_REPLY_INITIAL_WAIT_SECONDS = 5
+REMINDMEBOT_REPLY_MAX_WAIT_SECONDS = 60
+REMINDMEBOT_REPLY_TIMEOUT_SECONDS = 10 * 60
 REMINDMEBOT_USERNAME = 'RemindMeBot'
+SAVED_RESOURCES_FILENAME = 'saved-resources.json'
 SAVED_RESOURCES_KEY = 'savedResources'
+SKIPPED_RESOURCES_ACCOUNT_FILENAME = 'skipped-resources-{}.json'
+SKIPPED_RESOURCES_FILENAME = 'skipped-resources.json'
 SOURCE_KEY = 'source'
-SUBREDDIT_TYPE_KEY = 'subredditType'
+SQLITE_FORMAT = 'sqlite'
+SUBMISSION_FULLNAME_PREFIX = 't3_'
+SUBMISSION_ID_KEY = 'submissionId'
+SUBREDDITS_BATCH_SIZE = 1000
+SUBREDDITS_FILENAME = 'subreddits.json'
 SUBREDDITS_KEY = 'subreddits'
+SUBREDDIT_CACHE_FILENAME = 'subreddit-cache.json'
+SUBREDDIT_CACHE_TTL_SECONDS = 24 * 60 * 60
+SUBREDDIT_NAME_ERROR_TYPES = ('BAD_SR_NAME', 'SUBREDDIT_NOEXIST', 'SUBREDDIT_NOTALLOWED')
+SUBREDDIT_TYPE_KEY = 'subredditType'
+TOKEN_CACHE_FILENAME = 'token-cache.json'
+TOKEN_CACHE_FILE_MODE = 0o600
+TRANSFER_QUEUE_SIZE = 1000
+UPLOADED_EVENT = 'uploaded'
+UPLOAD_ACCOUNTS_VARIABLE_NAME = 'UPLOAD_ACCOUNTS'
 UPLOAD_PASSWORD_VARIABLE_NAME = 'UPLOAD_PASSWORD'
 UPLOAD_USERNAME_VARIABLE_NAME = 'UPLOAD_USERNAME'
 USER_AGENT = 'reddit-account-migration'
 VISIBILITY_KEY = 'visibility'
-WAITING_TO_CHECK_REDDIT_INBOX_MESSAGE = 'Waiting 10 seconds to check Reddit inbox'
+ZSTD_COMPRESSION = 'zstd'
 
-BLOCKED_USERS_FILENAME = f'{DATA_DIRECTORY_NAME}/blocked-users.json'
 GET_ACCOUNT_CREDENTIALS_MESSAGE_DOWNLOAD = f'{GET_ACCOUNT_CREDENTIALS_MESSAGE_PREFIX}download:'
 GET_ACCOUNT_CREDENTIALS_MESSAGE_UPLOAD = f'{GET_ACCOUNT_CREDENTIALS_MESSAGE_PREFIX}upload:'
-MULTIREDDITS_FILENAME = f'{DATA_DIRECTORY_NAME}/multireddits.json'
-REMINDMEBOT_REMINDERS_FILENAME = f'{DATA_DIRECTORY_NAME}/remindmebot-reminders.json'
-SAVED_RESOURCES_FILENAME = f'{DATA_DIRECTORY_NAME}/saved-resources.json'
-SKIPPED_RESOURCES_FILENAME = f'{DATA_DIRECTORY_NAME}/skipped-resources.json'
-SUBREDDITS_FILENAME = f'{DATA_DIRECTORY_NAME}/subreddits.json'
 
+COMPRESSION_EXTENSIONS = {
+    GZIP_COMPRESSION: '.gz',
+    NO_COMPRESSION: '',
+    ZSTD_COMPRESSION: '.zst',
+}
 
-def download_remindmebot_reminders_from_reddit(reddit):
-    """Download remindmebot reminders from Reddit and return them.
-    
-    Keyword arguments:
-    reddit -- the PRAW Reddit instance
+# Path segments that name a particular resource, which the report groups together
+REPORT_ENDPOINT_PATTERNS = (
+    (re.compile(r'/comments/[^/]+'), '/comments/{id}'),
+    (re.compile(r'/m/[^/]+'), '/m/{multireddit}'),
+    (re.compile(r'/r/[^/]+'), '/r/{subreddit}'),
+    (re.compile(r'/user/[^/]+'), '/user/{name}'),
+)
+
+RESOURCE_FILENAMES = {
+    BLOCKED_USERS_KEY: BLOCKED_USERS_FILENAME,
+    MULTIREDDITS_KEY: MULTIREDDITS_FILENAME,
+    REMINDMEBOT_REMINDERS_KEY: REMINDMEBOT_REMINDERS_FILENAME,
+    SAVED_RESOURCES_KEY: SAVED_RESOURCES_FILENAME,
+    SUBREDDITS_KEY: SUBREDDITS_FILENAME,
+}
+
+RESOURCE_NAMES = {
+    BLOCKED_USERS_KEY: 'Blocked users',
+    MULTIREDDITS_KEY: 'Multireddits',
+    REMINDMEBOT_REMINDERS_KEY: 'Remindmebot reminders',
+    SAVED_RESOURCES_KEY: 'Saved resources',
+    SUBREDDITS_KEY: 'Subreddits',
+}
+
+
+class InstrumentedRequestor:
+    """A prawcore requestor that records the endpoint, latency, status, size and rate-limit headers of every request for the report of its Migrator.
+
+    It wraps prawcore's requestor instead of extending it, so that PRAW and prawcore are only imported once a Migrator connects to Reddit. Importing them takes a noticeable part of the start-up time, e.g., of --help and of local operations like --convert.
     """
-    print('\nDownloading remindmebot reminders from Reddit')
-    remindmebot_reminders = []
-    message_sent_timestamp = datetime.datetime.now().timestamp()
-    print('Messaging RemindMeBot to get current reminders')
-    reddit.redditor(REMINDMEBOT_USERNAME).message(REMINDMEBOT_MESSAGE_SUBJECT, REMINDMEBOT_MESSAGE_BODY)
-    print(WAITING_TO_CHECK_REDDIT_INBOX_MESSAGE)
-    remindmebot_message = None
-    while not remindmebot_message:
-        time.sleep(10)
-        print('Checking Reddit inbox for reply from RemindMeBot')
-        messages = reddit.inbox.messages(limit=None)
-        for message in messages:
-            if message.author and message.author.name == reddit.user.me().name and message.body == REMINDMEBOT_MESSAGE_BODY and message.subject == REMINDMEBOT_MESSAGE_SUBJECT and message.created_utc >= message_sent_timestamp and message.replies:
-                remindmebot_message = message.replies[0].body
-                break
-            elif message.created_utc < message_sent_timestamp:
-                print("Didn't find reply from RemindMeBot")
+
+    def __init__(self, *args, migrator, **kwargs):
+        """Create the prawcore requestor to wrap.
+
+        Keyword arguments:
+        args -- the arguments of the prawcore requestor
+        migrator -- the Migrator whose report records the requests
+        kwargs -- the other keyword arguments of the prawcore requestor
+        """
+        import prawcore
+        self.migrator = migrator
+        self.requestor = prawcore.Requestor(*args, **kwargs)
+
+    def __getattr__(self, name):
+        """Return the attribute of the prawcore requestor, e.g., its OAuth URL.
+
+        Keyword arguments:
+        name -- the name of the attribute
+        """
+        return getattr(self.requestor, name)
+
+    def request(self, *args, **kwargs):
+        """Issue the HTTP request and record it.
+
+        Keyword arguments:
+        args -- the method and URL of the request
+        kwargs -- the other arguments of the request
+        """
+        request_start_time = time.monotonic()
+        response = None
+        try:
+            response = self.requestor.request(*args, **kwargs)
+            return response
+        finally:
+            self.migrator.record_request(args[0], args[1], time.monotonic() - request_start_time, response)
+
+
+class Migrator:
+    """A migration of the resources of a Reddit account, holding its options, config, connections to Reddit, journal, report and skipped resources.
+
+    Each Migrator keeps its own state, so several can run in one process at the same time as long as they use different data directories. run() does what the command line does, and download(), upload(), plan() and the methods of each resource type can be called on their own.
+    """
+
+    def __init__(self, config, is_interactive=False, **options):
+        """Create a migrator with no connections to Reddit yet, raising a ValueError if the options can't be used together.
+        
+        Keyword arguments:
+        config -- the config.py module, or any object with its variables, e.g., DOWNLOAD_CLIENT_ID and UPLOAD_ACCOUNTS
+        is_interactive -- whether or not to let the user enter their Reddit account credentials again when authentication fails, as the command line does (default False)
+        options -- the options, named like the long command line arguments with underscores, e.g., include_saved_resources=True (default the command line defaults)
+        """
+        self.args = get_argument_parser().parse_args([])
+        for name, value in options.items():
+            if not hasattr(self.args, name):
+                raise TypeError(f"Migrator got an unexpected option '{name}'")
+            setattr(self.args, name, value)
+        if self.args.concurrency < 1:
+            raise ValueError('the concurrency must be at least 1')
+        if self.args.incremental and self.is_streaming():
+            # Transfers upload the resources as they're downloaded, before the whole download can be compared with the archive
+            raise ValueError("--incremental can't be used with --stream, as transferred resources aren't compared with the archive")
+        if self.args.compression != NO_COMPRESSION and self.args.format == SQLITE_FORMAT:
+            raise ValueError(f"the {SQLITE_FORMAT} format can't be compressed")
+        if self.args.compression == ZSTD_COMPRESSION and not importlib.util.find_spec('zstandard'):
+            raise ValueError(f'{ZSTD_COMPRESSION} compression needs the zstandard package (pip install zstandard)')
+        self.changes_lock = threading.Lock()
+        self.config = config
+        self.download_reddit = None
+        self.is_interactive = is_interactive
+        self.journal = {
+            'file': None,
+            'lastSyncTime': 0,
+            'lock': threading.Lock(),
+            'phases': {},
+        }
+        self.progress_line = {
+            'lastRenderTime': 0,
+            'lock': threading.Lock(),
+            'progresses': [],
+        }
+        self.report = {
+            'lock': threading.Lock(),
+            'phases': {},
+            'requests': [],
+            'startTime': time.monotonic(),
+        }
+        self.report_thread = threading.local()
+        self.subreddit_cache_lock = threading.Lock()
+        # The skipped resources of each upload account and whether or not its uploads were confirmed up front, keyed by username
+        self.upload_accounts = {}
+        self.upload_reddits = None
+        # The usernames of the Reddit accounts, keyed by account key, so that each is looked up at most once
+        self.usernames = {}
+
+    def archive_exists(self, key, filename):
+        """Return whether or not the archive of the filename already has resources of the key.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        """
+        archive_filename = self.get_archive_filename(filename)
+        if self.args.format != SQLITE_FORMAT or not exists(archive_filename):
+            return exists(archive_filename)
+        connection = self.open_archive_database()
+        try:
+            return connection.execute(f'SELECT 1 FROM {key} LIMIT 1').fetchone() is not None
+        finally:
+            connection.close()
+
+    def cache_access_token(self, reddit):
+        """Save the access token and username of the PRAW Reddit instance to the token cache, so that later runs can skip authenticating until the access token expires.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        token_cache = self.read_token_cache()
+        token_cache[get_account_key(reddit)] = {
+            **get_access_token(reddit),
+            'username': self.get_username(reddit),
+        }
+        self.write_token_cache(token_cache)
+
+    def clear_progress_line(self):
+        """Erase the progress line on a terminal."""
+        if not self.args.quiet and sys.stdout.isatty():
+            sys.stdout.write('\r\x1b[K')
+
+    def close(self):
+        """Write the report if the report option asks for one, and close the journal."""
+        if self.args.report:
+            self.write_report_to_file()
+        self.close_journal()
+
+    def close_journal(self):
+        """Flush the journal to disk and close it."""
+        if self.journal['file']:
+            self.sync_journal()
+            self.journal['file'].close()
+            self.journal['file'] = None
+
+    def convert_files_to_archive(self):
+        """Convert the JSON files in the data directory to archives in the format and compression arguments."""
+        print(f'Converting data files to the {self.args.format} format with {self.args.compression} compression')
+        for key, filename in RESOURCE_FILENAMES.items():
+            json_filename = self.get_data_filename(filename)
+            if not exists(json_filename) or not self.should_overwrite_archive(key, filename):
+                continue
+            resources_converted_count = 0
+            for _ in self.stream_to_archive(key, get_from_file(json_filename, key), filename):
+                resources_converted_count += 1
+            print(f'{RESOURCE_NAMES[key]} converted from {json_filename} to {self.get_archive_filename(filename)}: {resources_converted_count}')
+
+    def download(self):
+        """Download the resources that the options ask for from the download account and write them to the archives, leaving out the ones that the upload streams."""
+        if not self.journal['file']:
+            self.open_journal(self.args.resume)
+        print('Downloading data from Reddit')
+        download_reddit = self.get_download_reddit()
+        download_phases = []
+        if self.args.include_remindmebot_reminders:
+            download_phases.append((self.download_remindmebot_reminders_from_reddit, REMINDMEBOT_REMINDERS_KEY, REMINDMEBOT_REMINDERS_FILENAME))
+        if self.args.include_saved_resources:
+            download_phases.append((self.download_saved_resources_from_reddit, SAVED_RESOURCES_KEY, SAVED_RESOURCES_FILENAME))
+        if not self.args.skip_blocked_users and not self.is_streaming():
+            download_phases.append((self.stream_blocked_users_from_reddit, BLOCKED_USERS_KEY, BLOCKED_USERS_FILENAME))
+        if not self.args.skip_multireddits and not self.is_streaming():
+            download_phases.append((self.stream_multireddits_from_reddit, MULTIREDDITS_KEY, MULTIREDDITS_FILENAME))
+        if not self.args.skip_subreddits and not self.is_streaming():
+            download_phases.append((self.stream_subreddits_from_reddit, SUBREDDITS_KEY, SUBREDDITS_FILENAME))
+        self.download_phases_from_reddit(download_reddit, download_phases)
+
+    def download_remindmebot_reminders_from_reddit(self, reddit):
+        """Download remindmebot reminders from Reddit and return them, or None if RemindMeBot didn't reply in time.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        print('\nDownloading remindmebot reminders from Reddit')
+        journaled_entries, _, is_download_completed = self.get_journaled_downloads(REMINDMEBOT_REMINDERS_KEY, is_resumable=False)
+        if is_download_completed:
+            return [journaled_entry[ITEM_KEY] for journaled_entry in journaled_entries]
+        remindmebot_reminders = []
+        message_sent_timestamp = datetime.datetime.now().timestamp()
+        print('Messaging RemindMeBot to get current reminders')
+        reddit.redditor(REMINDMEBOT_USERNAME).message(REMINDMEBOT_MESSAGE_SUBJECT, REMINDMEBOT_MESSAGE_BODY)
+        remindmebot_message = self.get_remindmebot_reply_from_reddit(reddit, message_sent_timestamp)
+        if not remindmebot_message:
+            # The download isn't journaled as completed, so a resumed run messages RemindMeBot again
+            print(f"Didn't find reply from RemindMeBot within {self.args.remindmebot_timeout} seconds, skipping remindmebot reminders")
+            return None
+        for line in remindmebot_message.split('\n'):
+            if line.startswith('|[Source](https://'):
+                line_segments = line.split('|')
+                source = line_segments[2] if line_segments[2] else line_segments[1].split('(')[-1].replace(')', '')
+                reminder_datetime = line_segments[3].split('**')[1]
+                remindmebot_reminders.append({
+                    DATETIME_KEY: reminder_datetime,
+                    SOURCE_KEY: source,
+                })
+                self.write_journal_entry(DOWNLOADED_EVENT, REMINDMEBOT_REMINDERS_KEY, item=remindmebot_reminders[-1])
+        self.write_journal_entry(DOWNLOAD_COMPLETED_EVENT, REMINDMEBOT_REMINDERS_KEY)
+        print('Total remindmebot reminders downloaded:', len(remindmebot_reminders))
+        return remindmebot_reminders
+
+    def download_incrementally_from_reddit(self, reddit, download_function, key, filename):
+        """Download the changes to the resources since the last download, record them and return the updated resources.
+
+        The saved listing is newest first, so it's only read up to the first saved resource that the archive already has, and the new saved resources are added in front of the archived ones. Saved resources that were unsaved since can't be told apart without the whole listing, so they're kept. With the SQLite archive, the saved resources are looked up by fullname in its index instead of reading the archive into memory. The other resource types are downloaded in full, as they take a request per 100 subreddits at most, and replace the archived ones.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        download_function -- the function that downloads the resources from Reddit and returns or yields them
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        """
+        is_archived = self.archive_exists(key, filename)
+        if key == SAVED_RESOURCES_KEY and self.args.format == SQLITE_FORMAT:
+            def is_known_fullname(fullname):
+                return self.get_archived_resource(key, fullname) is not None
+
+            new_saved_resources = self.download_saved_resources_from_reddit(reddit, is_known_fullname if is_archived else None)
+            new_fullnames = {get_saved_resource_fullname(saved_resource) for saved_resource in new_saved_resources}
+            added_resources = []
+            changed_resources = []
+            for saved_resource in new_saved_resources:
+                previous_saved_resource = self.get_archived_resource(key, get_saved_resource_fullname(saved_resource)) if is_archived else None
+                if previous_saved_resource is None:
+                    added_resources.append(saved_resource)
+                elif previous_saved_resource != saved_resource:
+                    changed_resources.append(saved_resource)
+            self.write_changes_to_file(key, added_resources, changed_resources, [])
+            print(f'{RESOURCE_NAMES[key]} since the last download: {len(added_resources)} added, {len(changed_resources)} changed, 0 removed')
+            # The archived saved resources are read as the archive is rewritten, which only replaces them once they've all been read
+            archived_saved_resources = self.read_from_archive(key, filename) if is_archived else []
+            return chain(new_saved_resources, (saved_resource for saved_resource in archived_saved_resources if get_saved_resource_fullname(saved_resource) not in new_fullnames))
+        # The archive is read in full before the download starts, as writing the updated resources replaces it
+        previous_resources = list(self.read_from_archive(key, filename)) if is_archived else []
+        if key == SAVED_RESOURCES_KEY:
+            known_fullnames = {get_saved_resource_fullname(saved_resource) for saved_resource in previous_resources}
+            new_saved_resources = self.download_saved_resources_from_reddit(reddit, known_fullnames.__contains__)
+            # A resumed run can find the new saved resources in the archive already, if the last run wrote it before stopping
+            new_fullnames = {get_saved_resource_fullname(saved_resource) for saved_resource in new_saved_resources}
+            resources = new_saved_resources + [saved_resource for saved_resource in previous_resources if get_saved_resource_fullname(saved_resource) not in new_fullnames]
+        else:
+            resources = list(download_function(reddit))
+        previous_resources_by_name = {get_incremental_resource_name(key, resource): resource for resource in previous_resources}
+        resource_names = {get_incremental_resource_name(key, resource) for resource in resources}
+        added_resources = [resource for resource in resources if get_incremental_resource_name(key, resource) not in previous_resources_by_name]
+        changed_resources = [
+            resource
+            for resource in resources
+            if get_incremental_resource_name(key, resource) in previous_resources_by_name and previous_resources_by_name[get_incremental_resource_name(key, resource)] != resource
+        ]
+        removed_resources = [resource for resource in previous_resources if get_incremental_resource_name(key, resource) not in resource_names]
+        self.write_changes_to_file(key, added_resources, changed_resources, removed_resources)
+        print(f'{RESOURCE_NAMES[key]} since the last download: {len(added_resources)} added, {len(changed_resources)} changed, {len(removed_resources)} removed')
+        return resources
+
+    def download_phase_from_reddit(self, reddit, download_function, key, filename, should_write_to_archive):
+        """Download a phase from Reddit, appending each resource to its archive as it arrives.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        download_function -- the function that downloads the resources from Reddit and returns or yields them, or returns None if it failed
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        should_write_to_archive -- whether or not to write the resources to the archive
+        """
+        with self.report_phase(f'download {key}'):
+            if self.is_downloaded_incrementally(key):
+                resources = self.download_incrementally_from_reddit(reddit, download_function, key, filename)
+            else:
+                resources = download_function(reddit)
+            if resources is None:
+                # The download failed, so the archive keeps the resources of the last download
+                return
+            if should_write_to_archive:
+                resources = self.stream_to_archive(key, resources, filename)
+            for _ in resources:
+                pass
+
+    def download_phases_from_reddit(self, reddit, download_phases):
+        """Download the phases from Reddit, running up to the concurrency argument of them at the same time, and write each phase to its archive.
+
+        Each phase gets its own PRAW Reddit instance, and all of them share one rate-limit budget.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        download_phases -- the (download function, resource key, filename) tuples of the phases
+        """
+        download_start_time = time.monotonic()
+        # Ask about overwriting up front, as the phases write their archives while they download. Incremental downloads update their archives instead
+        download_phases = [
+            (download_function, key, filename, self.is_downloaded_incrementally(key) or self.should_overwrite_archive(key, filename))
+            for download_function, key, filename in download_phases
+        ]
+        if self.args.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+                futures = [executor.submit(self.download_phase_from_reddit, self.get_phase_reddit(reddit), *download_phase) for download_phase in download_phases]
+                for future in futures:
+                    future.result()
+        else:
+            for download_phase in download_phases:
+                self.download_phase_from_reddit(reddit, *download_phase)
+        print(f'\nDownloaded data from Reddit in {time.monotonic() - download_start_time:.1f} seconds with a concurrency of {self.args.concurrency}')
+
+    def download_saved_resources_from_reddit(self, reddit, is_known_fullname=None):
+        """Download saved resources from Reddit and return them.
+
+        Saved comments only reference their submission, so the submission titles that the listing doesn't include are resolved afterwards in batches instead of one lazy fetch per comment.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        is_known_fullname -- the function that returns whether or not a saved resource with the fullname was already downloaded, where the newest first listing stops at the first of them (default None)
+        """
+        from praw.models import Comment, Submission
+        print('\nDownloading saved resources from Reddit')
+        journaled_entries, cursor, is_download_completed = self.get_journaled_downloads(SAVED_RESOURCES_KEY)
+        saved_resources_list = []
+        submission_ids_without_title = []
+        submission_titles = {}
+        for journaled_entry in journaled_entries:
+            if SUBMISSION_ID_KEY in journaled_entry:
+                submission_ids_without_title.append((len(saved_resources_list), journaled_entry[SUBMISSION_ID_KEY]))
+            saved_resources_list.append(journaled_entry[ITEM_KEY])
+        saved_resources = [] if is_download_completed else reddit.redditor(self.get_username(reddit)).saved(limit=None, params=get_listing_params(cursor))
+        progress = Progress(self, 'Saved resources downloaded', count=len(saved_resources_list))
+        for saved_resource in saved_resources:
+            if is_known_fullname and is_known_fullname(saved_resource.fullname):
                 break
-        print(f'{WAITING_TO_CHECK_REDDIT_INBOX_MESSAGE} again')
-    for line in remindmebot_message.split('\n'):
-        if line.startswith('|[Source](https://'):
-            line_segments = line.split('|')
-            source = line_segments[2] if line_segments[2] else line_segments[1].split('(')[-1].replace(')', '')
-            reminder_datetime = line_segments[3].split('**')[1]
-            remindmebot_reminders.append({
-                DATETIME_KEY: reminder_datetime,
-                SOURCE_KEY: source,
+            saved_resource_data = get_listing_data(saved_resource)
+            saved_resource_type = None
+            if isinstance(saved_resource, Comment):
+                saved_resource_type = 'comment'
+                submission_id = saved_resource_data['link_id'].split('_', 1)[1]
+                title = saved_resource_data.get('link_title')
+            elif isinstance(saved_resource, Submission):
+                saved_resource_type = 'submission'
+                submission_id = saved_resource.id
+                title = saved_resource_data['title']
+            else:
+                print('\n\n\nERROR new saved resource type')
+                print(saved_resource)
+                continue
+            journal_fields = {}
+            if title:
+                submission_titles[submission_id] = title
+            else:
+                submission_ids_without_title.append((len(saved_resources_list), submission_id))
+                journal_fields[SUBMISSION_ID_KEY] = submission_id
+            author = saved_resource_data.get('author')
+            saved_resources_list.append({
+                'authorName': author if not author else author.name,
+                FULLNAME_KEY: saved_resource.fullname,
+                'permalink': saved_resource.permalink,
+                'savedResourceType': saved_resource_type,
+                'title': title,
             })
-    print('Total remindmebot reminders downloaded:', len(remindmebot_reminders))
-    return remindmebot_reminders
+            self.write_journal_entry(DOWNLOADED_EVENT, SAVED_RESOURCES_KEY, cursor=saved_resource.fullname, item=saved_resources_list[-1], **journal_fields)
+            progress.update()
+        submission_titles.update(get_submission_titles_from_reddit(reddit, {submission_id for _, submission_id in submission_ids_without_title if submission_id not in submission_titles}))
+        for saved_resource_index, submission_id in submission_ids_without_title:
+            saved_resources_list[saved_resource_index]['title'] = submission_titles.get(submission_id)
+        self.write_journal_entry(DOWNLOAD_COMPLETED_EVENT, SAVED_RESOURCES_KEY)
+        progress.finish()
+        return saved_resources_list
 
+    def get_archive_filename(self, filename):
+        """Return the filename of the archive that holds the resources of the JSON filename in the format and compression arguments.
+        
+        Keyword arguments:
+        filename -- the JSON filename of the resources
+        """
+        if self.args.format == SQLITE_FORMAT:
+            return self.get_data_filename(ARCHIVE_DATABASE_FILENAME)
+        archive_filename = f'{filename}l' if self.args.format == JSONL_FORMAT else filename
+        return self.get_data_filename(f'{archive_filename}{COMPRESSION_EXTENSIONS[self.args.compression]}')
 
-def download_blocked_users_from_reddit(reddit):
-    """Download blocked users from Reddit and return them.
-    
-    Keyword arguments:
-    reddit -- the PRAW Reddit instance
-    """
-    print('\nDownloading blocked users from Reddit')
-    blocked_users = [blocked_user.name for blocked_user in reddit.user.blocked()]
-    print('Total blocked users downloaded:', len(blocked_users))
-    return blocked_users
- 
-
-def download_multireddits_from_reddit(reddit, should_prepend_newline=True):
-    """Download multireddits from Reddit and return them.
-    
-    Keyword arguments:
-    reddit -- the PRAW Reddit instance
-    should_prepend_newline -- whether or not to prepend the first print statement with a newline (default True)
-    """
-    print_message_prepend_newline('Downloading multireddits from Reddit', should_prepend_newline)
-    multireddits = reddit.user.multireddits()
-    multireddits_list = []
-    for multireddit in multireddits:
-        subreddits = []
-        [subreddits.append(subreddit.display_name) for subreddit in multireddit.subreddits]        
-        multireddits_list.append({
-            DISPLAY_NAME_KEY: multireddit.display_name,
-            SUBREDDITS_KEY: subreddits,
-            VISIBILITY_KEY: multireddit.visibility,
+    def get_archived_resource(self, key, name):
+        """Return the resource of the key with the name from its archive, or None if the archive doesn't have it.
+
+        The SQLite archive looks the name up in its index, while the other archives are read until the resource is found.
+        
+        Keyword arguments:
+        key -- the key of the resource
+        name -- the display name of the resource, the blocked user name or the fullname of a saved resource
+        """
+        if self.args.format == SQLITE_FORMAT:
+            connection = self.open_archive_database()
+            try:
+                row = connection.execute(f'SELECT data FROM {key} WHERE name = ? LIMIT 1', (name,)).fetchone()
+            finally:
+                connection.close()
+            return json.loads(row[0]) if row else None
+        if not exists(self.get_archive_filename(RESOURCE_FILENAMES[key])):
+            return None
+        for resource in self.read_from_archive(key, RESOURCE_FILENAMES[key]):
+            if (get_incremental_resource_name(key, resource) or '').lower() == name.lower():
+                return resource
+        return None
+
+    def get_data_filename(self, filename):
+        """Return the path of the file in the data directory option.
+        
+        Keyword arguments:
+        filename -- the filename in the data directory, e.g., SUBREDDITS_FILENAME
+        """
+        return os.path.join(self.args.data_directory, filename)
+
+    def get_download_reddit(self):
+        """Return the PRAW Reddit instance of the download account, connecting to Reddit the first time."""
+        if not self.download_reddit:
+            if getattr(self.config, DOWNLOAD_PASSWORD_VARIABLE_NAME, None) and getattr(self.config, DOWNLOAD_USERNAME_VARIABLE_NAME, None):
+                print(FOUND_ACCOUNT_CREDENTIALS_MESSAGE)
+                account_credentials = (self.config.DOWNLOAD_PASSWORD, self.config.DOWNLOAD_USERNAME)
+            else:
+                account_credentials = get_account_credentials(GET_ACCOUNT_CREDENTIALS_MESSAGE_DOWNLOAD)
+            self.download_reddit = self.get_reddit(account_credentials, self.config.DOWNLOAD_CLIENT_ID, self.config.DOWNLOAD_CLIENT_SECRET, GET_ACCOUNT_CREDENTIALS_MESSAGE_DOWNLOAD)
+        return self.download_reddit
+
+    def get_journaled_downloads(self, phase, is_resumable=True):
+        """Return the download journal entries, the listing cursor to continue from and whether or not the download was completed for the phase of the resumed run.
+
+        A phase that can't continue where it stopped starts over unless it was completed, which is journaled so that the entries of the earlier attempt aren't resumed again alongside the new ones.
+
+        Keyword arguments:
+        phase -- the resource key of the phase
+        is_resumable -- whether or not the phase can continue from its journaled entries, i.e., its listing has a cursor (default True)
+        """
+        journaled_phase = self.journal['phases'].get(phase, {})
+        if not is_resumable and not journaled_phase.get(DOWNLOAD_COMPLETED_EVENT, False):
+            self.write_journal_entry(DOWNLOAD_RESTARTED_EVENT, phase)
+            return ([], None, False)
+        journaled_entries = journaled_phase.get(DOWNLOADED_EVENT, [])
+        if journaled_entries:
+            print(f'Resuming from {len(journaled_entries)} journaled items')
+        return (journaled_entries, journaled_phase.get(CURSOR_KEY), journaled_phase.get(DOWNLOAD_COMPLETED_EVENT, False))
+
+    def get_journaled_uploads(self, phase):
+        """Return the set of items that the resumed run already uploaded for the phase.
+
+        Keyword arguments:
+        phase -- the journal phase of the uploads, from get_upload_journal_phase
+        """
+        uploaded_items = self.journal['phases'].get(phase, {}).get(UPLOADED_EVENT, set())
+        if uploaded_items:
+            print(f'Resuming after {len(uploaded_items)} journaled uploads')
+        return uploaded_items
+
+    def get_missing_resources_from_reddit(self, reddit, resources):
+        """Return the resources that the Reddit account doesn't have yet, printing how many of each will be uploaded.
+
+        The account's current blocked users, multireddits, saved resources and subreddits are downloaded once and indexed by name, or by fullname for saved resources, in sets. Remindmebot reminders can't be listed without messaging RemindMeBot, so they're all kept, as are multireddits when they're merged into existing ones.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        resources -- the resources to upload, keyed by resource key, in lists or any iterable
+        """
+        print('\nComparing the data with the Reddit account so that only missing resources are uploaded')
+        existing_resource_names = {}
+        if BLOCKED_USERS_KEY in resources:
+            existing_resource_names[BLOCKED_USERS_KEY] = {blocked_user.name.lower() for blocked_user in reddit.user.blocked()}
+        if MULTIREDDITS_KEY in resources and not self.args.merge_multireddits:
+            existing_resource_names[MULTIREDDITS_KEY] = set(get_existing_multireddits_from_reddit(reddit))
+        if SAVED_RESOURCES_KEY in resources:
+            existing_resource_names[SAVED_RESOURCES_KEY] = {saved_resource.fullname for saved_resource in reddit.redditor(self.get_username(reddit)).saved(limit=None)}
+        if SUBREDDITS_KEY in resources:
+            existing_resource_names[SUBREDDITS_KEY] = {subreddit.display_name.lower() for subreddit in reddit.user.subreddits(limit=None)}
+        print('Reddit account:', self.get_username(reddit))
+        missing_resources = {}
+        for key, resource_list in resources.items():
+            if key not in existing_resource_names:
+                missing_resources[key] = resource_list
+            elif isinstance(resource_list, list):
+                missing_resources[key] = [resource for resource in resource_list if get_incremental_resource_name(key, resource).lower() not in existing_resource_names[key]]
+                print(f'{RESOURCE_NAMES[key]}: {len(missing_resources[key])} to upload, {len(resource_list) - len(missing_resources[key])} already on the account')
+            elif self.is_streaming():
+                # Transferred resources are filtered as they're downloaded, so they can't be counted up front
+                missing_resources[key] = (resource for resource in resource_list if get_incremental_resource_name(key, resource).lower() not in existing_resource_names[key])
+                print(f'{RESOURCE_NAMES[key]}: filtered as they are uploaded')
+            else:
+                # Archives read one resource at a time are counted in a pass of their own, so that they're never held in memory
+                resource_count = 0
+                missing_resource_count = 0
+                for resource in self.read_from_archive(key, RESOURCE_FILENAMES[key]):
+                    resource_count += 1
+                    if get_incremental_resource_name(key, resource).lower() not in existing_resource_names[key]:
+                        missing_resource_count += 1
+                missing_resources[key] = (resource for resource in resource_list if get_incremental_resource_name(key, resource).lower() not in existing_resource_names[key])
+                print(f'{RESOURCE_NAMES[key]}: {missing_resource_count} to upload, {resource_count - missing_resource_count} already on the account')
+        return missing_resources
+
+    def get_phase_reddit(self, reddit):
+        """Return a new PRAW Reddit instance for the account of the given instance that shares its rate limiter.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        import praw
+        phase_reddit = praw.Reddit(
+            client_id=reddit.config.client_id,
+            client_secret=reddit.config.client_secret,
+            password=reddit.config.password,
+            requestor_class=InstrumentedRequestor,
+            requestor_kwargs={'migrator': self},
+            user_agent=USER_AGENT,
+            username=reddit.config.username,
+        )
+        phase_reddit._core._rate_limiter = reddit._core._rate_limiter
+        # Reuse the access token instead of authenticating again for every phase
+        access_token = get_access_token(reddit)
+        if access_token:
+            set_access_token(phase_reddit, access_token)
+        return phase_reddit
+
+    def get_reddit(self, account_credentials, client_id, client_secret, message):
+        """Get the PRAW Reddit instance with a SharedRateLimiter, allowing the user to enter their Reddit account credentials again if authentication fails and the migrator is interactive, or raising the OAuthException otherwise.
+
+        An access token that an earlier run saved to the token cache is used until it expires, skipping authentication. Reddit's password grant doesn't issue refresh tokens, so a new access token is requested with the password once it expires or is rejected.
+        
+        Keyword arguments:
+        account_credentials -- the Reddit account credentials
+        client_id -- the client ID for the Reddit app
+        client_secret -- the client secret for the Reddit app
+        message -- the message to prompt the user with if authentication fails
+        """
+        # PRAW is imported the first time Reddit is needed, as it takes a noticeable part of the start-up time
+        import praw
+        import prawcore
+        while True:
+            try:
+                reddit = praw.Reddit(
+                    client_id=client_id,
+                    client_secret=client_secret,
+                    password=account_credentials[0],
+                    requestor_class=InstrumentedRequestor,
+                    requestor_kwargs={'migrator': self},
+                    user_agent=USER_AGENT,
+                    username=account_credentials[1],
+                )
+                reddit._core._rate_limiter = SharedRateLimiter(self)
+                if not self.load_cached_access_token(reddit):
+                    # Authenticate and look up the username with one request
+                    self.get_username(reddit)
+                    self.cache_access_token(reddit)
+                return reddit
+            except prawcore.OAuthException:
+                if not self.is_interactive:
+                    raise
+                print('\nError: Authentication failed. Would you like to try entering your Reddit account credentials again? (y/n)')
+                user_input = input('> ')
+                if user_input == 'n':
+                    exit_script()
+                account_credentials = get_account_credentials(message)
+
+    def get_remindmebot_reply_from_reddit(self, reddit, message_sent_timestamp):
+        """Wait for RemindMeBot to reply to the message sent at the timestamp and return the body of the reply, or None if the remindmebot timeout argument runs out first.
+
+        Each check reads only the newest page of the inbox and stops at the first message older than the sent message, and the wait between checks doubles up to a limit.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        message_sent_timestamp -- the timestamp of the message sent to RemindMeBot
+        """
+        username = self.get_username(reddit)
+        deadline = time.monotonic() + self.args.remindmebot_timeout
+        wait_seconds = REMINDMEBOT_REPLY_INITIAL_WAIT_SECONDS
+        while True:
+            wait_seconds = min(wait_seconds, max(deadline - time.monotonic(), 0))
+            print(f'Waiting {wait_seconds:.0f} seconds to check Reddit inbox')
+            time.sleep(wait_seconds)
+            print('Checking Reddit inbox for reply from RemindMeBot')
+            for message in reddit.inbox.messages(limit=REMINDMEBOT_INBOX_MESSAGE_LIMIT):
+                if message.created_utc < message_sent_timestamp:
+                    break
+                if message.author and message.author.name == username and message.body == REMINDMEBOT_MESSAGE_BODY and message.subject == REMINDMEBOT_MESSAGE_SUBJECT and message.replies:
+                    return message.replies[0].body
+            if time.monotonic() >= deadline:
+                return None
+            wait_seconds = min(wait_seconds * 2, REMINDMEBOT_REPLY_MAX_WAIT_SECONDS)
+
+    def get_report_phase(self):
+        """Return the report phase of the current thread."""
+        return getattr(self.report_thread, 'phase', OTHER_REPORT_PHASE)
+
+    def get_report_phase_summary(self, phase):
+        """Return the report summary of the phase, creating it if needed. The caller must hold the report lock.
+        
+        Keyword arguments:
+        phase -- the report phase
+        """
+        if phase not in self.report['phases']:
+            self.report['phases'][phase] = {
+                'bytes': 0,
+                'endpoints': {},
+                'networkSeconds': 0,
+                'rateLimitWaitSeconds': 0,
+                'requestCount': 0,
+                'statusCounts': {},
+                'wallSeconds': 0,
+            }
+        return self.report['phases'][phase]
+
+    def get_report_phases_total(self, phases, field):
+        """Return the total of a field of the report summaries of the phases, e.g., their request count.
+        
+        Keyword arguments:
+        phases -- the report phases
+        field -- the field of the report summaries
+        """
+        with self.report['lock']:
+            return sum(self.report['phases'][phase][field] for phase in phases if phase in self.report['phases'])
+
+    def get_saved_resources_to_upload(self, reddit, saved_resources):
+        """Return the saved resources that the upload account doesn't have from the journal yet and that haven't been deleted or removed, oldest first, skipping the deleted and removed ones.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the upload account
+        saved_resources -- the saved resources, newest first as they were downloaded
+        """
+        uploaded_saved_resources = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, SAVED_RESOURCES_KEY))
+        saved_resources = [saved_resource for saved_resource in reversed(saved_resources) if get_saved_resource_fullname(saved_resource) not in uploaded_saved_resources]
+        existing_fullnames = get_existing_fullnames_from_reddit(reddit, [get_saved_resource_fullname(saved_resource) for saved_resource in saved_resources])
+        saved_resources_to_upload = []
+        for saved_resource in saved_resources:
+            if get_saved_resource_fullname(saved_resource) in existing_fullnames:
+                saved_resources_to_upload.append(saved_resource)
+            else:
+                print(f"Skipping saved resource {saved_resource['permalink']} as it's been deleted or removed")
+                self.get_skipped_resources(reddit)[SAVED_RESOURCES_KEY].append(saved_resource)
+        return saved_resources_to_upload
+
+    def get_skipped_resources(self, reddit):
+        """Return the skipped resources of the upload account, keyed by resource key.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the upload account
+        """
+        return self.get_upload_account(reddit)['skippedResources']
+
+    def get_subreddits_to_upload(self, reddit, subreddits):
+        """Return the subreddits that can be subscribed to, skipping subreddits that no longer exist or are private or quarantined.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the upload account
+        subreddits -- the subreddits to check
+        """
+        subreddits_to_upload = []
+        for subreddit in self.validate_subreddits_with_reddit(reddit, subreddits):
+            if subreddit[IS_QUARANTINED_KEY]:
+                print(f"Skipping subreddit {subreddit[DISPLAY_NAME_KEY]} as it's quarantined")
+            elif subreddit[SUBREDDIT_TYPE_KEY] != 'private':
+                subreddits_to_upload.append(subreddit)
+                continue
+            else:
+                print(f"Skipping subreddit {subreddit[DISPLAY_NAME_KEY]} as it's private")
+            self.get_skipped_resources(reddit)[SUBREDDITS_KEY].append(subreddit)
+        return subreddits_to_upload
+
+    def get_upload_account(self, reddit):
+        """Return the skipped resources of the upload account and whether or not its uploads were confirmed up front, starting them the first time the account is used.
+
+        upload() and plan() start every upload account before uploading, while upload methods called on their own start their account here.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the upload account
+        """
+        return self.upload_accounts.setdefault(self.get_username(reddit), {
+            'isConfirmed': False,
+            'skippedResources': {
+                MULTIREDDITS_KEY: [],
+                REMINDMEBOT_REMINDERS_KEY: [],
+                SAVED_RESOURCES_KEY: [],
+                SUBREDDITS_KEY: [],
+            },
         })
-        print('Multireddits downloaded:', len(multireddits_list))
-    print('Total multireddits downloaded:', len(multireddits_list))
-    return multireddits_list
 
+    def get_upload_resources_per_account(self, account_count, download_reddit=None):
+        """Return the resources to upload to each upload account, keyed by resource key, reading or transferring them as the arguments say.
+        
+        Keyword arguments:
+        account_count -- the number of upload accounts
+        download_reddit -- the PRAW Reddit instance to transfer resources from when streaming (default None)
+        """
+        # The transfers download at the same time, each in its own thread, and PRAW Reddit instances aren't thread safe
+        account_resources = {}
+        if self.args.include_remindmebot_reminders:
+            account_resources[REMINDMEBOT_REMINDERS_KEY] = [list(self.read_from_archive(REMINDMEBOT_REMINDERS_KEY, REMINDMEBOT_REMINDERS_FILENAME))] * account_count
+        if self.args.include_saved_resources:
+            account_resources[SAVED_RESOURCES_KEY] = [list(self.read_from_archive(SAVED_RESOURCES_KEY, SAVED_RESOURCES_FILENAME))] * account_count
+        if not self.args.skip_blocked_users and download_reddit:
+            account_resources[BLOCKED_USERS_KEY] = self.transfer_resources_from_reddit(self.get_phase_reddit(download_reddit), BLOCKED_USERS_KEY, BLOCKED_USERS_FILENAME, self.stream_blocked_users_from_reddit, account_count)
+        elif not self.args.skip_blocked_users:
+            account_resources[BLOCKED_USERS_KEY] = self.read_from_archive_for_accounts(BLOCKED_USERS_KEY, BLOCKED_USERS_FILENAME, account_count)
+        if not self.args.skip_multireddits and download_reddit:
+            account_resources[MULTIREDDITS_KEY] = self.transfer_resources_from_reddit(self.get_phase_reddit(download_reddit), MULTIREDDITS_KEY, MULTIREDDITS_FILENAME, self.stream_multireddits_from_reddit, account_count)
+        elif not self.args.skip_multireddits:
+            account_resources[MULTIREDDITS_KEY] = self.read_from_archive_for_accounts(MULTIREDDITS_KEY, MULTIREDDITS_FILENAME, account_count)
+        if not self.args.skip_subreddits and download_reddit:
+            account_resources[SUBREDDITS_KEY] = self.transfer_resources_from_reddit(self.get_phase_reddit(download_reddit), SUBREDDITS_KEY, SUBREDDITS_FILENAME, self.stream_subreddits_from_reddit, account_count)
+        elif not self.args.skip_subreddits:
+            account_resources[SUBREDDITS_KEY] = self.read_from_archive_for_accounts(SUBREDDITS_KEY, SUBREDDITS_FILENAME, account_count)
+        return [{key: resources[account_index] for key, resources in account_resources.items()} for account_index in range(account_count)]
 
-def download_saved_resources_from_reddit(reddit):
-    """Download saved resources from Reddit and return them.
-    
-    Keyword arguments:
-    reddit -- the PRAW Reddit instance
-    """
-    print('\nDownloading saved resources from Reddit')
-    saved_resources = reddit.user.me().saved(limit=None)
-    saved_resources_list = []
-    for saved_resource in saved_resources:
-        saved_resource_type = None
-        if isinstance(saved_resource, Comment):
-            saved_resource_type = 'comment'
-        elif isinstance(saved_resource, Submission):
-            saved_resource_type = 'submission'
+    def get_upload_journal_phase(self, reddit, key):
+        """Return the journal phase of the uploads of the key to the upload account, so that a resumed run only skips the resources that this account already has.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the upload account
+        key -- the key of the resources
+        """
+        return f'{key}/{self.get_username(reddit)}'
+
+    def get_upload_reddits(self):
+        """Return a PRAW Reddit instance for each upload account, connecting to Reddit the first time.
+
+        The upload accounts are the ones in the UPLOAD_ACCOUNTS list of the config.py file if it has one, or the UPLOAD account otherwise. The user is prompted for the credentials of accounts without a username and password.
+        """
+        if self.upload_reddits is not None:
+            return self.upload_reddits
+        upload_account_configs = getattr(self.config, UPLOAD_ACCOUNTS_VARIABLE_NAME, None) or [{
+            'client_id': self.config.UPLOAD_CLIENT_ID,
+            'client_secret': self.config.UPLOAD_CLIENT_SECRET,
+            'password': getattr(self.config, UPLOAD_PASSWORD_VARIABLE_NAME, None),
+            'username': getattr(self.config, UPLOAD_USERNAME_VARIABLE_NAME, None),
+        }]
+        self.upload_reddits = []
+        for upload_account_config in upload_account_configs:
+            if upload_account_config.get('password') and upload_account_config.get('username'):
+                print(FOUND_ACCOUNT_CREDENTIALS_MESSAGE)
+                account_credentials = (upload_account_config['password'], upload_account_config['username'])
+            else:
+                account_credentials = get_account_credentials(GET_ACCOUNT_CREDENTIALS_MESSAGE_UPLOAD)
+            self.upload_reddits.append(self.get_reddit(account_credentials, upload_account_config['client_id'], upload_account_config['client_secret'], GET_ACCOUNT_CREDENTIALS_MESSAGE_UPLOAD))
+        return self.upload_reddits
+
+    def get_username(self, reddit):
+        """Return the username of the Reddit account of the PRAW Reddit instance, asking Reddit only the first time in a run for each account.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        account_key = get_account_key(reddit)
+        if account_key not in self.usernames:
+            self.usernames[account_key] = reddit.user.me().name
+        return self.usernames[account_key]
+
+    def is_downloaded_incrementally(self, key):
+        """Return whether or not the resources of the key are downloaded incrementally, which RemindMeBot's list of current reminders can't be.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        """
+        return self.args.incremental and key != REMINDMEBOT_REMINDERS_KEY
+
+    def is_streaming(self):
+        """Return whether or not blocked users, multireddits and subreddits are transferred by the upload instead of being downloaded first."""
+        return self.args.stream and self.args.download and self.args.upload
+
+    def load_cached_access_token(self, reddit):
+        """Give the PRAW Reddit instance the access token and username of its account from the token cache, and return whether or not the token cache had an access token that hasn't expired.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        cached_access_token = self.read_token_cache().get(get_account_key(reddit))
+        if not cached_access_token or time.time() >= cached_access_token['expirationTimestamp']:
+            return False
+        set_access_token(reddit, cached_access_token)
+        self.usernames[get_account_key(reddit)] = cached_access_token['username']
+        return True
+
+    def open_archive_database(self):
+        """Open the SQLite archive, creating a table with a name index for each resource type, and return the connection.
+
+        The name is the display name of the resource, or the fullname of a saved resource.
+        """
+        Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+        connection = sqlite3.connect(self.get_data_filename(ARCHIVE_DATABASE_FILENAME), timeout=ARCHIVE_DATABASE_TIMEOUT_SECONDS)
+        # Write-ahead logging lets phases read the archive while another phase replaces its table
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for key in RESOURCE_NAMES:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS {key} (position INTEGER PRIMARY KEY, name TEXT COLLATE NOCASE, data TEXT NOT NULL)')
+            connection.execute(f'CREATE INDEX IF NOT EXISTS {key}_name ON {key} (name)')
+        # Saved resources used to be written without a name, so archives from before get their fullnames filled in
+        connection.execute(f"UPDATE {SAVED_RESOURCES_KEY} SET name = json_extract(data, '$.{FULLNAME_KEY}') WHERE name IS NULL")
+        connection.commit()
+        return connection
+
+    def open_journal(self, should_resume):
+        """Open the journal, loading the progress of the last run if it should be resumed or starting a new journal otherwise.
+
+        Keyword arguments:
+        should_resume -- whether or not to resume the last run
+        """
+        Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+        journal_filename = self.get_data_filename(JOURNAL_FILENAME)
+        self.journal['phases'] = {}
+        if should_resume and exists(journal_filename):
+            print(f'Resuming the last run from {journal_filename}')
+            journal_length = 0
+            with open(journal_filename, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line can be incomplete if the run was interrupted while writing it
+                        break
+                    journal_length += len(line)
+                    journaled_phase = self.journal['phases'].setdefault(entry[PHASE_KEY], {
+                        DOWNLOAD_COMPLETED_EVENT: False,
+                        DOWNLOADED_EVENT: [],
+                        UPLOADED_EVENT: set(),
+                    })
+                    if entry[EVENT_KEY] == DOWNLOADED_EVENT:
+                        journaled_phase[DOWNLOADED_EVENT].append(entry)
+                        journaled_phase[CURSOR_KEY] = entry.get(CURSOR_KEY)
+                    elif entry[EVENT_KEY] == DOWNLOAD_COMPLETED_EVENT:
+                        journaled_phase[DOWNLOAD_COMPLETED_EVENT] = True
+                    elif entry[EVENT_KEY] == DOWNLOAD_RESTARTED_EVENT:
+                        journaled_phase[DOWNLOADED_EVENT] = []
+                        journaled_phase.pop(CURSOR_KEY, None)
+                    elif entry[EVENT_KEY] == UPLOADED_EVENT:
+                        journaled_phase[UPLOADED_EVENT].update(entry[ITEMS_KEY])
+            os.truncate(journal_filename, journal_length)
+            self.journal['file'] = open(journal_filename, 'a')
         else:
-            print('\n\n\nERROR new saved resource type')
-            print(saved_resource)
-            continue
-        saved_resources_list.append({
-            'authorName': saved_resource.author if not saved_resource.author else saved_resource.author.name,
-            'permalink': saved_resource.permalink,
-            'savedResourceType': saved_resource_type,
-            'title': saved_resource.title if not hasattr(saved_resource, 'submission') else saved_resource.submission.title,
-        })
-        print('Saved resources downloaded:', len(saved_resources_list))
-    print('Total saved resources downloaded:', len(saved_resources_list))
-    return saved_resources_list
+            self.journal['file'] = open(journal_filename, 'w')
+        self.journal['lastSyncTime'] = time.monotonic()
 
+    def plan(self):
+        """Print the plan of the upload to every upload account without writing to Reddit."""
+        # Only the last run's journal is read, so that the plan leaves out what the resume option would skip
+        if self.args.resume and not self.journal['file']:
+            self.open_journal(True)
+        print('Planning the upload to Reddit')
+        upload_reddits = self.get_upload_reddits()
+        self.register_upload_accounts(upload_reddits)
+        self.plan_upload_to_reddit_accounts(upload_reddits)
 
-def download_subreddits_from_reddit(reddit):
-    """Download subreddits from Reddit and return them.
-    
-    Keyword arguments:
-    reddit -- the PRAW Reddit instance
+    def plan_upload_to_reddit(self, reddit, resources):
+        """Print the requests and write calls that uploading the resources to the Reddit account would make and about how long it would take, and return the estimate in seconds.
+
+        The checks that the upload makes before writing (the sync comparison, existing multireddits, deleted saved resources and subreddit validation) are made here too, so the write calls are counted exactly, and the latency and rate-limit budget are measured along the way. Only subreddit batches that Reddit rejects and splits make more write calls than planned. Nothing is written to Reddit.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the account
+        resources -- the resources to upload, keyed by resource key, in lists or any iterable
+        """
+        username = self.get_username(reddit)
+        print(f'\nPlanning the upload to Reddit account {username}')
+        latency_phase = f'plan latency {username}'
+        with self.report_phase(latency_phase):
+            # Measure the latency with at least one request, even when nothing else has to be read
+            reddit.user.me(use_cache=False)
+        # Each plan is (resource key, details, read count, write count, concurrent write count)
+        resource_plans = []
+        sync_phase = f'plan sync {username}'
+        if self.args.sync:
+            with self.report_phase(sync_phase):
+                resources = self.get_missing_resources_from_reddit(reddit, resources)
+        if REMINDMEBOT_REMINDERS_KEY in resources:
+            uploaded_remindmebot_reminders = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, REMINDMEBOT_REMINDERS_KEY))
+            # Only the first remindmebot reminder is uploaded for now, as in upload_remindmebot_reminders_to_reddit
+            write_count = len([
+                remindmebot_reminder
+                for remindmebot_reminder in resources[REMINDMEBOT_REMINDERS_KEY][:1]
+                if get_remindmebot_reminder_message(remindmebot_reminder) not in uploaded_remindmebot_reminders
+            ])
+            resource_plans.append((REMINDMEBOT_REMINDERS_KEY, f'{write_count} to message RemindMeBot about', 0, write_count, 0))
+        if SAVED_RESOURCES_KEY in resources:
+            with self.report_phase(f'plan {SAVED_RESOURCES_KEY} {username}'):
+                write_count = len(self.get_saved_resources_to_upload(reddit, resources[SAVED_RESOURCES_KEY]))
+            resource_plans.append((SAVED_RESOURCES_KEY, f'{write_count} to save', self.get_report_phases_total([f'plan {SAVED_RESOURCES_KEY} {username}'], 'requestCount'), write_count, write_count))
+        if BLOCKED_USERS_KEY in resources:
+            uploaded_blocked_users = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, BLOCKED_USERS_KEY))
+            write_count = len([blocked_user for blocked_user in resources[BLOCKED_USERS_KEY] if blocked_user not in uploaded_blocked_users])
+            # PRAW looks up the ID of each user before blocking them
+            resource_plans.append((BLOCKED_USERS_KEY, f'{write_count} to block', write_count, write_count, 0))
+        if MULTIREDDITS_KEY in resources:
+            with self.report_phase(f'plan {MULTIREDDITS_KEY} {username}'):
+                existing_multireddits = get_existing_multireddits_from_reddit(reddit)
+            uploaded_multireddits = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, MULTIREDDITS_KEY))
+            create_count = skip_count = update_count = 0
+            for multireddit in resources[MULTIREDDITS_KEY]:
+                existing_multireddit = existing_multireddits.get(multireddit[DISPLAY_NAME_KEY].lower())
+                if multireddit[DISPLAY_NAME_KEY] in uploaded_multireddits:
+                    continue
+                if not existing_multireddit:
+                    create_count += 1
+                elif self.args.merge_multireddits:
+                    update_count += bool(get_missing_subreddit_names(existing_multireddit, multireddit))
+                else:
+                    skip_count += 1
+            resource_plans.append((MULTIREDDITS_KEY, f'{create_count} to create, {update_count} to update, {skip_count} to skip as they already exist', self.get_report_phases_total([f'plan {MULTIREDDITS_KEY} {username}'], 'requestCount'), create_count + update_count, 0))
+        if SUBREDDITS_KEY in resources:
+            uploaded_subreddits = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, SUBREDDITS_KEY))
+            batch_count = subreddit_count = 0
+            with self.report_phase(f'plan {SUBREDDITS_KEY} {username}'):
+                for subreddit_batch in get_batches((subreddit for subreddit in resources[SUBREDDITS_KEY] if subreddit[DISPLAY_NAME_KEY] not in uploaded_subreddits), SUBREDDITS_BATCH_SIZE):
+                    subreddits_to_upload = self.get_subreddits_to_upload(reddit, subreddit_batch)
+                    batch_count += bool(subreddits_to_upload)
+                    subreddit_count += len(subreddits_to_upload)
+            resource_plans.append((SUBREDDITS_KEY, f'{subreddit_count} to subscribe to in {batch_count} batches', self.get_report_phases_total([f'plan {SUBREDDITS_KEY} {username}'], 'requestCount'), batch_count, 0))
+        plan_phases = [latency_phase, sync_phase, *(f'plan {key} {username}' for key in RESOURCE_NAMES)]
+        latency_seconds = self.get_report_phases_total(plan_phases, 'networkSeconds') / max(self.get_report_phases_total(plan_phases, 'requestCount'), 1)
+        rate_limiter = reddit._core._rate_limiter
+        print(f'\nPlan for Reddit account {username}')
+        sync_request_count = self.get_report_phases_total([sync_phase], 'requestCount')
+        if sync_request_count:
+            print(f'Sync comparison: {sync_request_count} requests (0 write calls)')
+        for key, details, read_count, write_count, _ in resource_plans:
+            print(f'{RESOURCE_NAMES[key]}: {details}, {read_count + write_count} requests ({write_count} write calls)')
+        request_count = sync_request_count + sum(read_count + write_count for _, _, read_count, write_count, _ in resource_plans)
+        concurrent_request_count = sum(concurrent_write_count for *_, concurrent_write_count in resource_plans)
+        # The saved resources are saved by up to the concurrency argument of workers, and everything else one request at a time
+        plan_seconds = latency_seconds * (request_count - concurrent_request_count + concurrent_request_count / self.args.concurrency)
+        print(f'Measured latency: {latency_seconds * 1000:.0f} ms per request')
+        if rate_limiter.remaining is not None:
+            seconds_to_reset = max(rate_limiter.reset_timestamp - time.time(), 0)
+            print(f'Rate limit: {rate_limiter.remaining:.0f} of {rate_limiter.remaining + rate_limiter.used:.0f} requests left, resetting in {seconds_to_reset:.0f} seconds')
+            if request_count > rate_limiter.remaining:
+                # Once the budget is spent, the rest of the requests go out at the pace of the rate-limit window
+                window_request_count = max(rate_limiter.remaining + rate_limiter.used, 1)
+                plan_seconds = max(plan_seconds, seconds_to_reset + (request_count - rate_limiter.remaining) / window_request_count * RATE_LIMIT_WINDOW_SECONDS)
+        print(f'Total: {request_count} requests ({sum(write_count for _, _, _, write_count, _ in resource_plans)} write calls), about {datetime.timedelta(seconds=round(plan_seconds))}')
+        return plan_seconds
+
+    def plan_upload_to_reddit_accounts(self, upload_reddits):
+        """Print the plan of the upload to each upload account without writing to Reddit.
+        
+        Keyword arguments:
+        upload_reddits -- the PRAW Reddit instances of the upload accounts
+        """
+        plan_seconds = [
+            self.plan_upload_to_reddit(upload_reddit, resources)
+            for upload_reddit, resources in zip(upload_reddits, self.get_upload_resources_per_account(len(upload_reddits)))
+        ]
+        if len(upload_reddits) > 1:
+            print(f'\nThe accounts upload at the same time, so the whole upload would take about {datetime.timedelta(seconds=round(max(plan_seconds)))}')
+        print('\nNothing was uploaded, as this was only a plan')
+
+    def record_rate_limit_wait(self, seconds):
+        """Add the time spent waiting on the rate limit to the report phase of the current thread.
+        
+        Keyword arguments:
+        seconds -- the seconds waited
+        """
+        if not self.args.report and not self.args.plan:
+            return
+        with self.report['lock']:
+            self.get_report_phase_summary(self.get_report_phase())['rateLimitWaitSeconds'] += seconds
+
+    def record_request(self, method, url, latency_seconds, response):
+        """Add a request to the report and to the summary of the report phase of the current thread.
+        
+        Keyword arguments:
+        method -- the HTTP method of the request
+        url -- the URL of the request
+        latency_seconds -- the seconds the request took
+        response -- the response, or None if the request failed without one
+        """
+        if not self.args.report and not self.args.plan:
+            return
+        endpoint = urlparse(url).path.rstrip('/') or '/'
+        for pattern, replacement in REPORT_ENDPOINT_PATTERNS:
+            endpoint = pattern.sub(replacement, endpoint)
+        endpoint = f'{method.upper()} {endpoint}'
+        status = response.status_code if response is not None else None
+        size = len(response.content) if response is not None else 0
+        phase = self.get_report_phase()
+        with self.report['lock']:
+            self.report['requests'].append({
+                'bytes': size,
+                'endpoint': endpoint,
+                'latencySeconds': round(latency_seconds, 6),
+                'phase': phase,
+                'rateLimit': {header: response.headers[header] for header in ('x-ratelimit-remaining', 'x-ratelimit-reset', 'x-ratelimit-used') if header in response.headers} if response is not None else {},
+                'status': status,
+                'timestamp': time.time(),
+            })
+            phase_summary = self.get_report_phase_summary(phase)
+            phase_summary['bytes'] += size
+            phase_summary['networkSeconds'] += latency_seconds
+            phase_summary['requestCount'] += 1
+            phase_summary['statusCounts'][str(status)] = phase_summary['statusCounts'].get(str(status), 0) + 1
+            endpoint_summary = phase_summary['endpoints'].setdefault(endpoint, {'bytes': 0, 'networkSeconds': 0, 'requestCount': 0})
+            endpoint_summary['bytes'] += size
+            endpoint_summary['networkSeconds'] += latency_seconds
+            endpoint_summary['requestCount'] += 1
+
+    def render_progress_line(self, should_force=False):
+        """Redraw the progress line of the running counters on a terminal, unless it was redrawn too recently.
+        
+        Keyword arguments:
+        should_force -- whether or not to redraw it even if it was redrawn recently (default False)
+        """
+        if self.args.quiet or not sys.stdout.isatty():
+            return
+        with self.progress_line['lock']:
+            if not should_force and time.monotonic() - self.progress_line['lastRenderTime'] < PROGRESS_RENDER_INTERVAL_SECONDS:
+                return
+            self.progress_line['lastRenderTime'] = time.monotonic()
+            line = ' | '.join(progress.get_status() for progress in self.progress_line['progresses'])
+            # Leave the cursor at the start of the line, so that other output overwrites the line instead of following it
+            sys.stdout.write(f'\r{line}\x1b[K\r')
+            sys.stdout.flush()
+
+    def read_from_archive(self, key, filename):
+        """Return the resources of the key from the archive of the filename, as a list for JSON files and as a generator that reads them one at a time otherwise.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        """
+        archive_filename = self.get_archive_filename(filename)
+        if not exists(archive_filename):
+            raise FileNotFoundError(f"{archive_filename} doesn't exist")
+        if self.args.format == JSON_FORMAT:
+            return get_from_file(archive_filename, key)
+        return self.stream_from_archive(key, archive_filename)
+
+    def read_from_archive_for_accounts(self, key, filename, account_count):
+        """Return the resources of the key from the archive of the filename once for each upload account.
+
+        Lists are read once and shared by the accounts, while archives that are read one resource at a time get a generator per account.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        account_count -- the number of upload accounts
+        """
+        resources = self.read_from_archive(key, filename)
+        if isinstance(resources, list):
+            return [resources] * account_count
+        return [resources] + [self.read_from_archive(key, filename) for _ in range(account_count - 1)]
+
+    def read_token_cache(self):
+        """Return the access tokens in the token cache keyed by account key, or an empty dictionary if the token cache doesn't exist or can't be read."""
+        token_cache_filename = self.get_data_filename(TOKEN_CACHE_FILENAME)
+        if not exists(token_cache_filename):
+            return {}
+        try:
+            with open(token_cache_filename) as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+    @contextmanager
+    def report_phase(self, phase):
+        """Count the requests, rate-limit waits and wall time of the current thread towards the report phase while in the context.
+        
+        Keyword arguments:
+        phase -- the report phase, e.g., 'download subreddits'
+        """
+        previous_phase = self.get_report_phase()
+        self.report_thread.phase = phase
+        phase_start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self.report_thread.phase = previous_phase
+            if self.args.report or self.args.plan:
+                with self.report['lock']:
+                    self.get_report_phase_summary(phase)['wallSeconds'] += time.monotonic() - phase_start_time
+
+    def register_upload_accounts(self, upload_reddits):
+        """Start the skipped resources of each upload account afresh, raising a ValueError if an account is listed more than once.
+        
+        Keyword arguments:
+        upload_reddits -- the PRAW Reddit instances of the upload accounts
+        """
+        # Every upload starts with no skipped resources, as a Migrator can upload more than once
+        self.upload_accounts = {}
+        for upload_reddit in upload_reddits:
+            if self.get_username(upload_reddit) in self.upload_accounts:
+                raise ValueError(f'{self.get_username(upload_reddit)} is in {UPLOAD_ACCOUNTS_VARIABLE_NAME} more than once')
+            self.get_upload_account(upload_reddit)
+
+    def run(self):
+        """Convert, plan, download and upload as the options say, as the command line does, then write the report and close the journal.
+
+        The report and journal are written even if the run fails, as the report of a failed run shows where it went wrong.
+        """
+        try:
+            if self.args.convert:
+                self.convert_files_to_archive()
+            if self.args.plan:
+                self.plan()
+            else:
+                if self.args.download:
+                    self.download()
+                if self.args.upload:
+                    self.upload()
+        finally:
+            self.close()
+
+    def should_overwrite(self, message='\nDo you want to upload this data to your Reddit account?', reddit=None):
+        """Return whether or not the resource should be overwritten.
+        
+        Keyword arguments:
+        message -- the message to prompt the user with (default Reddit overwrite message string)
+        reddit -- the PRAW Reddit instance, whose uploads are confirmed up front when uploading to several accounts (default None)
+        """
+        if self.args.overwrite or (reddit and self.get_upload_account(reddit)['isConfirmed']):
+            return True
+        print(message)
+        if reddit:
+            print('Reddit account:', self.get_username(reddit))
+        user_input = input('(y/n)\n> ')
+        return user_input == 'y'
+
+    def should_overwrite_archive(self, key, filename):
+        """Return whether or not the resources of the key should be written to the archive of the filename, asking first if the archive already has some.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        """
+        if not self.archive_exists(key, filename):
+            return True
+        return self.should_overwrite(f'\n{self.get_archive_filename(filename)} already has {RESOURCE_NAMES[key].lower()}. Do you want to overwrite them?')
+
+    def stream_blocked_users_from_reddit(self, reddit):
+        """Download blocked users from Reddit and yield them.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        print('\nDownloading blocked users from Reddit')
+        journaled_entries, _, is_download_completed = self.get_journaled_downloads(BLOCKED_USERS_KEY, is_resumable=False)
+        if is_download_completed:
+            yield from (journaled_entry[ITEM_KEY] for journaled_entry in journaled_entries)
+            return
+        progress = Progress(self, 'Blocked users downloaded')
+        for blocked_user in reddit.user.blocked():
+            self.write_journal_entry(DOWNLOADED_EVENT, BLOCKED_USERS_KEY, item=blocked_user.name)
+            progress.update()
+            yield blocked_user.name
+        self.write_journal_entry(DOWNLOAD_COMPLETED_EVENT, BLOCKED_USERS_KEY)
+        progress.finish()
+
+    def stream_from_archive(self, key, archive_filename):
+        """Read the resources of the key from the JSON Lines or SQLite archive one at a time and yield them.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        archive_filename -- the filename of the archive
+        """
+        if self.args.format == SQLITE_FORMAT:
+            connection = self.open_archive_database()
+            try:
+                for (data,) in connection.execute(f'SELECT data FROM {key} ORDER BY position'):
+                    yield json.loads(data)
+            finally:
+                connection.close()
+            return
+        with open_archive_file(archive_filename, 'r') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def stream_multireddits_from_reddit(self, reddit):
+        """Download multireddits from Reddit and yield them.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        print('\nDownloading multireddits from Reddit')
+        journaled_entries, _, is_download_completed = self.get_journaled_downloads(MULTIREDDITS_KEY, is_resumable=False)
+        if is_download_completed:
+            yield from (journaled_entry[ITEM_KEY] for journaled_entry in journaled_entries)
+            return
+        multireddits = reddit.user.multireddits()
+        progress = Progress(self, 'Multireddits downloaded', len(multireddits))
+        for multireddit in multireddits:
+            subreddits = []
+            [subreddits.append(subreddit.display_name) for subreddit in multireddit.subreddits]        
+            multireddit_dictionary = {
+                DISPLAY_NAME_KEY: multireddit.display_name,
+                SUBREDDITS_KEY: subreddits,
+                VISIBILITY_KEY: multireddit.visibility,
+            }
+            self.write_journal_entry(DOWNLOADED_EVENT, MULTIREDDITS_KEY, item=multireddit_dictionary)
+            progress.update()
+            yield multireddit_dictionary
+        self.write_journal_entry(DOWNLOAD_COMPLETED_EVENT, MULTIREDDITS_KEY)
+        progress.finish()
+
+    def stream_subreddits_from_reddit(self, reddit):
+        """Download subreddits from Reddit and yield them, continuing after the journaled subreddits of a resumed run.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        """
+        print('\nDownloading subreddits from Reddit')
+        journaled_entries, cursor, is_download_completed = self.get_journaled_downloads(SUBREDDITS_KEY)
+        yield from (journaled_entry[ITEM_KEY] for journaled_entry in journaled_entries)
+        subreddits = [] if is_download_completed else reddit.user.subreddits(limit=None, params=get_listing_params(cursor))
+        progress = Progress(self, 'Subreddits downloaded', count=len(journaled_entries))
+        for subreddit in subreddits:
+            subreddit_dictionary = {
+                DISPLAY_NAME_KEY: subreddit.display_name,
+                IS_QUARANTINED_KEY: subreddit.quarantine,
+                SUBREDDIT_TYPE_KEY: subreddit.subreddit_type,
+            }
+            self.write_journal_entry(DOWNLOADED_EVENT, SUBREDDITS_KEY, cursor=subreddit.fullname, item=subreddit_dictionary)
+            progress.update()
+            yield subreddit_dictionary
+        self.write_journal_entry(DOWNLOAD_COMPLETED_EVENT, SUBREDDITS_KEY)
+        progress.finish()
+
+    def stream_to_archive(self, key, resources, filename):
+        """Write the resources to the archive of the filename as they pass through, and yield them.
+
+        JSON files keep the format of write_to_file, JSON Lines files get a line per resource, and the SQLite archive gets a row per resource. The resources are written to a partial file or a temporary table first, and only replace the archive once all of them were written, so a download that fails or is interrupted leaves the last archive as it was.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        resources -- the resources to write
+        filename -- the JSON filename of the resources
+        """
+        Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+        if self.args.format == SQLITE_FORMAT:
+            connection = self.open_archive_database()
+            try:
+                # The temporary table belongs to this connection, so phases running at the same time only lock the archive to replace their table
+                connection.execute(f'CREATE TEMP TABLE partial_{key} (position INTEGER PRIMARY KEY, name TEXT, data TEXT NOT NULL)')
+                for resource in resources:
+                    connection.execute(f'INSERT INTO partial_{key} (name, data) VALUES (?, ?)', (get_incremental_resource_name(key, resource), json.dumps(resource)))
+                    yield resource
+                connection.execute(f'DELETE FROM {key}')
+                connection.execute(f'INSERT INTO {key} (name, data) SELECT name, data FROM partial_{key} ORDER BY position')
+                connection.commit()
+            finally:
+                connection.close()
+            return
+        archive_filename = self.get_archive_filename(filename)
+        # The prefix keeps the extension that open_archive_file picks the compression from
+        partial_archive_filename = os.path.join(os.path.dirname(archive_filename), f'{PARTIAL_FILENAME_PREFIX}{os.path.basename(archive_filename)}')
+        try:
+            with open_archive_file(partial_archive_filename, 'w') as f:
+                if self.args.format == JSONL_FORMAT:
+                    for resource in resources:
+                        f.write(f'{json.dumps(resource)}\n')
+                        yield resource
+                else:
+                    f.write(f'{{{json.dumps(key)}: [')
+                    for index, resource in enumerate(resources):
+                        if index:
+                            f.write(', ')
+                        json.dump(resource, f)
+                        yield resource
+                    f.write(']}')
+            os.replace(partial_archive_filename, archive_filename)
+        finally:
+            if exists(partial_archive_filename):
+                os.remove(partial_archive_filename)
+
+    def sync_journal(self):
+        """Flush the journal and force it to disk."""
+        self.journal['file'].flush()
+        os.fsync(self.journal['file'].fileno())
+        self.journal['lastSyncTime'] = time.monotonic()
+
+    def transfer_resources_from_reddit(self, reddit, key, filename, stream_function, account_count=1):
+        """Download resources from Reddit in a background thread, writing them to the archive of the filename on the way, and return a generator for each upload account that yields them as they arrive.
+
+        The resources pass through a bounded queue per upload account, so the download stays at most TRANSFER_QUEUE_SIZE resources ahead of the slowest upload and memory use doesn't grow with the size of the account.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance to download from, which only the background thread may use
+        key -- the key of the resources
+        filename -- the JSON filename of the resources
+        stream_function -- the function that downloads the resources from Reddit and yields them
+        account_count -- the number of upload accounts (default 1)
+        """
+        should_write_to_archive = self.should_overwrite_archive(key, filename)
+        resource_queues = [queue.Queue(maxsize=TRANSFER_QUEUE_SIZE) for _ in range(account_count)]
+        download_exceptions = []
+
+        def download_resources():
+            try:
+                with self.report_phase(f'download {key}'):
+                    resources = stream_function(reddit)
+                    if should_write_to_archive:
+                        resources = self.stream_to_archive(key, resources, filename)
+                    for resource in resources:
+                        for resource_queue in resource_queues:
+                            resource_queue.put(resource)
+            except Exception as exception:
+                download_exceptions.append(exception)
+            finally:
+                # None marks the end of the download
+                for resource_queue in resource_queues:
+                    resource_queue.put(None)
+
+        def get_resources(resource_queue):
+            resource = resource_queue.get()
+            while resource is not None:
+                yield resource
+                resource = resource_queue.get()
+            if download_exceptions:
+                raise download_exceptions[0]
+
+        threading.Thread(target=download_resources, daemon=True).start()
+        return [get_resources(resource_queue) for resource_queue in resource_queues]
+
+    def upload(self):
+        """Upload the resources that the options ask for to every upload account, transferring them from the download account when streaming."""
+        if not self.journal['file']:
+            self.open_journal(self.args.resume)
+        print_message_prepend_newline('Uploading data to Reddit', self.args.download)
+        upload_reddits = self.get_upload_reddits()
+        self.register_upload_accounts(upload_reddits)
+        if len(upload_reddits) > 1:
+            # The accounts upload at the same time, so they're confirmed once here instead of before each upload
+            if not self.should_overwrite(f'\nDo you want to upload this data to these Reddit accounts: {", ".join(self.upload_accounts)}?'):
+                print('Not uploading data to Reddit')
+                return
+            for upload_account in self.upload_accounts.values():
+                upload_account['isConfirmed'] = True
+        self.upload_data_to_reddit_accounts(upload_reddits, self.get_upload_resources_per_account(len(upload_reddits), self.get_download_reddit() if self.is_streaming() else None))
+
+    def upload_blocked_users_to_reddit(self, blocked_users, reddit):
+        """Upload blocked users to Reddit.
+        
+        Keyword arguments:
+        blocked_users -- the blocked users to upload to Reddit
+        reddit -- the PRAW Reddit instance
+        """
+        print(f'\nUploading blocked users to Reddit account {self.get_username(reddit)}')
+        if not self.should_overwrite(reddit=reddit):
+            return
+        uploaded_blocked_users = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, BLOCKED_USERS_KEY))
+        progress = Progress(self, f'Blocked users uploaded to {self.get_username(reddit)}', get_resource_count(blocked_users))
+        for blocked_user in blocked_users:
+            if blocked_user in uploaded_blocked_users:
+                continue
+            reddit.redditor(blocked_user).block()
+            self.write_journal_entry(UPLOADED_EVENT, self.get_upload_journal_phase(reddit, BLOCKED_USERS_KEY), items=[blocked_user])
+            progress.update()
+        progress.finish()
+
+    def upload_data_to_reddit(self, reddit, resources):
+        """Upload the resources to the Reddit account, and finish any transfers afterwards even if an upload stopped early.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the account
+        resources -- the resources to upload, keyed by resource key, in lists or any iterable
+        """
+        username = self.get_username(reddit)
+        try:
+            resources_to_upload = self.get_missing_resources_from_reddit(reddit, resources) if self.args.sync else resources
+            if REMINDMEBOT_REMINDERS_KEY in resources_to_upload:
+                with self.report_phase(f'upload {REMINDMEBOT_REMINDERS_KEY} to {username}'):
+                    self.upload_remindmebot_reminders_to_reddit(reddit, resources_to_upload[REMINDMEBOT_REMINDERS_KEY])
+            if SAVED_RESOURCES_KEY in resources_to_upload:
+                with self.report_phase(f'upload {SAVED_RESOURCES_KEY} to {username}'):
+                    self.upload_saved_resources_to_reddit(reddit, resources_to_upload[SAVED_RESOURCES_KEY])
+            if BLOCKED_USERS_KEY in resources_to_upload:
+                with self.report_phase(f'upload {BLOCKED_USERS_KEY} to {username}'):
+                    self.upload_blocked_users_to_reddit(resources_to_upload[BLOCKED_USERS_KEY], reddit)
+            if MULTIREDDITS_KEY in resources_to_upload:
+                with self.report_phase(f'upload {MULTIREDDITS_KEY} to {username}'):
+                    self.upload_multireddits_to_reddit(resources_to_upload[MULTIREDDITS_KEY], reddit)
+            if SUBREDDITS_KEY in resources_to_upload:
+                with self.report_phase(f'upload {SUBREDDITS_KEY} to {username}'):
+                    self.upload_subreddits_to_reddit(reddit, resources_to_upload[SUBREDDITS_KEY])
+        finally:
+            for resource_list in resources.values():
+                finish_transfer(resource_list)
+
+    def upload_data_to_reddit_accounts(self, upload_reddits, resources_per_account):
+        """Upload the resources to every Reddit account at the same time and write the skipped resources of each account to file.
+
+        Each account uploads in its own thread with its own PRAW Reddit instance and rate-limit budget, so the upload takes about as long as the slowest account. An account that fails doesn't stop the others, and the first failure is raised once all of them have finished.
+        
+        Keyword arguments:
+        upload_reddits -- the PRAW Reddit instances of the accounts
+        resources_per_account -- the resources to upload to each account, in the order of the accounts
+        """
+        if len(upload_reddits) == 1:
+            self.upload_data_to_reddit(upload_reddits[0], resources_per_account[0])
+            self.write_skipped_resources_to_file(upload_reddits[0])
+            return
+        upload_start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(upload_reddits)) as executor:
+            futures = [executor.submit(self.upload_data_to_reddit, upload_reddit, resources) for upload_reddit, resources in zip(upload_reddits, resources_per_account)]
+        upload_exceptions = []
+        for upload_reddit, future in zip(upload_reddits, futures):
+            if future.exception():
+                print(f'\nError: Uploading to Reddit account {self.get_username(upload_reddit)} failed ({future.exception()!r})')
+                upload_exceptions.append(future.exception())
+            self.write_skipped_resources_to_file(upload_reddit)
+        print(f'\nUploaded data to {len(upload_reddits)} Reddit accounts in {time.monotonic() - upload_start_time:.1f} seconds')
+        if upload_exceptions:
+            raise upload_exceptions[0]
+
+    def upload_multireddits_to_reddit(self, multireddits, reddit):
+        """Upload multireddits to Reddit, skipping any multireddit that already exists unless the merge multireddits argument is given.
+
+        With the merge multireddits argument, the subreddits that an existing multireddit is missing are added to it in one update call. Existing multireddits that aren't missing any subreddits aren't written to, so they're counted separately from the uploaded ones.
+        
+        Keyword arguments:
+        multireddits -- the multireddits to upload to Reddit
+        reddit -- the PRAW Reddit instance
+        """
+        print(f'\nUploading multireddits to Reddit account {self.get_username(reddit)}')
+        print('Checking existing multireddits to prevent collisions')
+        existing_multireddits = get_existing_multireddits_from_reddit(reddit)
+        if not self.should_overwrite(reddit=reddit):
+            return
+        uploaded_multireddits = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, MULTIREDDITS_KEY))
+        progress = Progress(self, f'Multireddits uploaded to {self.get_username(reddit)}', get_resource_count(multireddits))
+        up_to_date_multireddit_count = 0
+        for multireddit in multireddits:
+            if multireddit[DISPLAY_NAME_KEY] in uploaded_multireddits:
+                continue
+            existing_multireddit = existing_multireddits.get(multireddit[DISPLAY_NAME_KEY].lower())
+            if existing_multireddit and self.args.merge_multireddits:
+                missing_subreddit_names = get_missing_subreddit_names(existing_multireddit, multireddit)
+                if not missing_subreddit_names:
+                    up_to_date_multireddit_count += 1
+                    continue
+                existing_multireddit.update(subreddits=[*existing_multireddit.subreddits, *missing_subreddit_names])
+                print(f'Added {len(missing_subreddit_names)} subreddits to existing multireddit {multireddit[DISPLAY_NAME_KEY]}')
+            elif existing_multireddit:
+                print(f'Skipping multireddit {multireddit[DISPLAY_NAME_KEY]} as it already exists')
+                self.get_skipped_resources(reddit)[MULTIREDDITS_KEY].append(multireddit)
+                continue
+            else:
+                reddit.multireddit.create(multireddit[DISPLAY_NAME_KEY], multireddit[SUBREDDITS_KEY], visibility=multireddit[VISIBILITY_KEY])
+            self.write_journal_entry(UPLOADED_EVENT, self.get_upload_journal_phase(reddit, MULTIREDDITS_KEY), items=[multireddit[DISPLAY_NAME_KEY]])
+            progress.update()
+        progress.finish()
+        if up_to_date_multireddit_count:
+            print(f'Existing multireddits of {self.get_username(reddit)} that already had all their subreddits: {up_to_date_multireddit_count}')
+
+    def upload_remindmebot_reminders_to_reddit(self, reddit, remindmebot_reminders):
+        """Upload remindmebot reminders to Reddit.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        remindmebot_reminders -- the remindmebot reminders to upload to Reddit
+        """
+        import praw
+        print(f'\nUploading remindmebot reminders to Reddit account {self.get_username(reddit)}')
+        if not remindmebot_reminders:
+            print('No remindmebot reminders to upload')
+            return
+        if not self.should_overwrite(reddit=reddit):
+            return
+        uploaded_remindmebot_reminders = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, REMINDMEBOT_REMINDERS_KEY))
+        progress = Progress(self, f'Remindmebot reminders uploaded to {self.get_username(reddit)}')
+        for remindmebot_reminder in remindmebot_reminders[:1]:
+            remindmebot_reminder_message = get_remindmebot_reminder_message(remindmebot_reminder)
+            if remindmebot_reminder_message in uploaded_remindmebot_reminders:
+                continue
+            try:
+                reddit.redditor(REMINDMEBOT_USERNAME).message(REMINDMEBOT_MESSAGE_SUBJECT, remindmebot_reminder_message)
+                self.write_journal_entry(UPLOADED_EVENT, self.get_upload_journal_phase(reddit, REMINDMEBOT_REMINDERS_KEY), items=[remindmebot_reminder_message])
+                progress.update()
+            except praw.exceptions.RedditAPIException as exception:
+                self.get_skipped_resources(reddit)[REMINDMEBOT_REMINDERS_KEY].append(remindmebot_reminder)
+                for subexception in exception.items:
+                    print(f'\nException: {subexception.error_type}')
+                print("\nError: RedditAPIException. If the error above is about RESTRICTED_TO_PM, it's possible your Reddit account is too new to send messages to other users. Please try this function again when your Reddit account has higher karma.\n")
+        progress.finish()
+
+    def upload_saved_resources_to_reddit(self, reddit, saved_resources):
+        """Upload saved resources to Reddit, skipping saved resources that have been deleted or removed.
+
+        The saved resources are saved oldest first so that they keep their order on the Reddit account. The save calls are spread over up to the concurrency argument of workers that share the rate limit, so saved resources a few places apart can swap places unless the concurrency is 1.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        saved_resources -- the saved resources to upload to Reddit, newest first as they were downloaded
+        """
+        print(f'\nUploading saved resources to Reddit account {self.get_username(reddit)}')
+        if not self.should_overwrite(reddit=reddit):
+            return
+        saved_resources_to_upload = self.get_saved_resources_to_upload(reddit, saved_resources)
+        worker_reddits = queue.Queue()
+        for _ in range(self.args.concurrency):
+            worker_reddits.put(self.get_phase_reddit(reddit))
+        phase = self.get_report_phase()
+
+        def save_saved_resource(saved_resource):
+            # Count the requests of the workers towards the phase that started them
+            self.report_thread.phase = phase
+            worker_reddit = worker_reddits.get()
+            try:
+                fullname = get_saved_resource_fullname(saved_resource)
+                if fullname.startswith(COMMENT_FULLNAME_PREFIX):
+                    worker_reddit.comment(id=fullname[len(COMMENT_FULLNAME_PREFIX):]).save()
+                else:
+                    worker_reddit.submission(id=fullname[len(SUBMISSION_FULLNAME_PREFIX):]).save()
+                return fullname
+            finally:
+                worker_reddits.put(worker_reddit)
+
+        progress = Progress(self, f'Saved resources uploaded to {self.get_username(reddit)}', len(saved_resources_to_upload))
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            # The results come back in order, so the journal never records a saved resource before the older ones
+            for fullname in executor.map(save_saved_resource, saved_resources_to_upload):
+                self.write_journal_entry(UPLOADED_EVENT, self.get_upload_journal_phase(reddit, SAVED_RESOURCES_KEY), items=[fullname])
+                progress.update()
+        progress.finish()
+
+    def upload_subreddit_batch_to_reddit(self, reddit, subreddit_batch):
+        """Upload a batch of subreddits to Reddit in one call and return how many were uploaded.
+
+        If Reddit rejects a name in the batch, it's split in half and each half is uploaded on its own, so that only the subreddits that can't be subscribed to (e.g., banned, deleted or renamed subreddits) are skipped. Other errors, e.g., rate limit, authentication and server errors, say nothing about the names, so they're raised instead of skipping valid subreddits.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        subreddit_batch -- the subreddits to upload to Reddit
+        """
+        import praw
+        import prawcore
+        display_names = [subreddit[DISPLAY_NAME_KEY] for subreddit in subreddit_batch]
+        try:
+            reddit.subreddit(display_names[0]).subscribe(other_subreddits=display_names[1:])
+        except (praw.exceptions.RedditAPIException, prawcore.exceptions.NotFound) as exception:
+            if isinstance(exception, praw.exceptions.RedditAPIException) and any(item.error_type not in SUBREDDIT_NAME_ERROR_TYPES for item in exception.items):
+                raise
+            if len(subreddit_batch) == 1:
+                print(f'Skipping subreddit {display_names[0]} as Reddit rejected it ({exception})')
+                self.get_skipped_resources(reddit)[SUBREDDITS_KEY].append(subreddit_batch[0])
+                return 0
+            half_length = len(subreddit_batch) // 2
+            return self.upload_subreddit_batch_to_reddit(reddit, subreddit_batch[:half_length]) + self.upload_subreddit_batch_to_reddit(reddit, subreddit_batch[half_length:])
+        self.write_journal_entry(UPLOADED_EVENT, self.get_upload_journal_phase(reddit, SUBREDDITS_KEY), items=display_names)
+        return len(subreddit_batch)
+
+    def upload_subreddits_to_reddit(self, reddit, subreddits):
+        """Upload subreddits to Reddit in batches, skipping subreddits that no longer exist or are private or quarantined.
+
+        The subreddits are read one batch at a time, so they can be given in any iterable, and the batches are paced by the rate limiter of the PRAW Reddit instance.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        subreddits -- the subreddits to upload to Reddit
+        """
+        print(f'\nUploading subreddits to Reddit account {self.get_username(reddit)}')
+        if not self.should_overwrite(reddit=reddit):
+            return
+        uploaded_subreddits = self.get_journaled_uploads(self.get_upload_journal_phase(reddit, SUBREDDITS_KEY))
+        subreddits = (subreddit for subreddit in subreddits if subreddit[DISPLAY_NAME_KEY] not in uploaded_subreddits)
+        progress = Progress(self, f'Subreddits uploaded to {self.get_username(reddit)}')
+        for subreddit_batch in get_batches(subreddits, SUBREDDITS_BATCH_SIZE):
+            subreddits_to_upload = self.get_subreddits_to_upload(reddit, subreddit_batch)
+            if subreddits_to_upload:
+                progress.update(self.upload_subreddit_batch_to_reddit(reddit, subreddits_to_upload))
+        progress.finish()
+
+    def validate_subreddits_with_reddit(self, reddit, subreddits):
+        """Return the subreddits with their current display name, quarantine status and type from Reddit, skipping the subreddits that no longer exist.
+
+        Reddit is asked about 100 subreddits per call, and its answers are cached in the data directory for a day. Accounts uploading at the same time take turns with the cache, so each subreddit is only checked once.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance
+        subreddits -- the subreddits to validate
+        """
+        with self.subreddit_cache_lock:
+            subreddit_cache = {}
+            subreddit_cache_filename = self.get_data_filename(SUBREDDIT_CACHE_FILENAME)
+            if exists(subreddit_cache_filename):
+                with open(subreddit_cache_filename) as f:
+                    subreddit_cache = json.load(f)
+            checked_timestamp = time.time()
+            uncached_display_names = [
+                subreddit[DISPLAY_NAME_KEY]
+                for subreddit in subreddits
+                if checked_timestamp - subreddit_cache.get(subreddit[DISPLAY_NAME_KEY].lower(), {}).get(CHECKED_TIMESTAMP_KEY, 0) > SUBREDDIT_CACHE_TTL_SECONDS
+            ]
+            if uncached_display_names:
+                print(f'Checking {len(uncached_display_names)} subreddits with Reddit')
+                for display_name in uncached_display_names:
+                    subreddit_cache[display_name.lower()] = {
+                        CHECKED_TIMESTAMP_KEY: checked_timestamp,
+                        EXISTS_KEY: False,
+                    }
+                for subreddit_model in reddit.info(subreddits=uncached_display_names):
+                    subreddit_data = get_listing_data(subreddit_model)
+                    subreddit_cache[subreddit_model.display_name.lower()] = {
+                        CHECKED_TIMESTAMP_KEY: checked_timestamp,
+                        DISPLAY_NAME_KEY: subreddit_model.display_name,
+                        EXISTS_KEY: True,
+                        IS_QUARANTINED_KEY: subreddit_data.get('quarantine', False),
+                        SUBREDDIT_TYPE_KEY: subreddit_data.get('subreddit_type'),
+                    }
+                Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+                with open(subreddit_cache_filename, 'w') as f:
+                    json.dump(subreddit_cache, f)
+        validated_subreddits = []
+        for subreddit in subreddits:
+            cached_subreddit = subreddit_cache[subreddit[DISPLAY_NAME_KEY].lower()]
+            if not cached_subreddit[EXISTS_KEY]:
+                print(f"Skipping subreddit {subreddit[DISPLAY_NAME_KEY]} as it doesn't exist anymore")
+                self.get_skipped_resources(reddit)[SUBREDDITS_KEY].append(subreddit)
+                continue
+            validated_subreddits.append({
+                DISPLAY_NAME_KEY: cached_subreddit[DISPLAY_NAME_KEY],
+                IS_QUARANTINED_KEY: cached_subreddit[IS_QUARANTINED_KEY],
+                SUBREDDIT_TYPE_KEY: cached_subreddit[SUBREDDIT_TYPE_KEY],
+            })
+        return validated_subreddits
+
+    def write_changes_to_file(self, key, added_resources, changed_resources, removed_resources):
+        """Append the changes that an incremental download found to the changes file.
+        
+        Keyword arguments:
+        key -- the key of the resources
+        added_resources -- the resources that weren't in the archive
+        changed_resources -- the resources whose data differs from the archive
+        removed_resources -- the archived resources that aren't on Reddit anymore
+        """
+        Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+        changes = {
+            'added': added_resources,
+            'changed': changed_resources,
+            'removed': removed_resources,
+            'resourceType': key,
+            'timestamp': datetime.datetime.now().isoformat(),
+        }
+        with self.changes_lock, open(self.get_data_filename(CHANGES_FILENAME), 'a') as f:
+            f.write(f'{json.dumps(changes)}\n')
+
+    def write_journal_entry(self, event, phase, **fields):
+        """Append an entry to the journal, flushing it after every entry and forcing it to disk at most every few seconds.
+
+        Keyword arguments:
+        event -- the event of the entry
+        phase -- the resource key of a download phase, or the journal phase of an upload from get_upload_journal_phase
+        fields -- additional fields of the entry
+        """
+        if not self.journal['file']:
+            return
+        with self.journal['lock']:
+            self.journal['file'].write(json.dumps({EVENT_KEY: event, PHASE_KEY: phase, **fields}) + '\n')
+            self.journal['file'].flush()
+            if time.monotonic() - self.journal['lastSyncTime'] >= JOURNAL_FSYNC_INTERVAL_SECONDS:
+                self.sync_journal()
+
+    def write_report_to_file(self):
+        """Write the report to the filename of the report argument, splitting the wall time of each phase into network, rate-limit waiting and local work."""
+        for phase_summary in self.report['phases'].values():
+            # Concurrent requests add up to more network time than wall time, in which case the local work is unknown
+            phase_summary['localSeconds'] = max(phase_summary['wallSeconds'] - phase_summary['networkSeconds'] - phase_summary['rateLimitWaitSeconds'], 0)
+        self.report['wallSeconds'] = time.monotonic() - self.report['startTime']
+        report_directory = os.path.dirname(self.args.report)
+        if report_directory:
+            Path(report_directory).mkdir(exist_ok=True, parents=True)
+        with open(self.args.report, 'w') as f:
+            json.dump({key: value for key, value in self.report.items() if key not in ('lock', 'startTime')}, f, indent=2)
+        print(f'Report was written to {self.args.report}')
+
+    def write_skipped_resources_to_file(self, reddit):
+        """Write the skipped resources of the upload account to file, with the username in the filename when uploading to several accounts.
+        
+        Keyword arguments:
+        reddit -- the PRAW Reddit instance of the upload account
+        """
+        skipped_resources_filename = self.get_data_filename(SKIPPED_RESOURCES_FILENAME if len(self.upload_accounts) == 1 else SKIPPED_RESOURCES_ACCOUNT_FILENAME.format(self.get_username(reddit)))
+        self.write_to_file(self.get_skipped_resources(reddit), skipped_resources_filename)
+        print(f'Skipped resources were written to {skipped_resources_filename}')
+
+    def write_token_cache(self, token_cache):
+        """Write the token cache, readable and writable only by the user.
+        
+        Keyword arguments:
+        token_cache -- the access tokens keyed by account key
+        """
+        Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+        token_cache_filename = self.get_data_filename(TOKEN_CACHE_FILENAME)
+        with open(os.open(token_cache_filename, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, TOKEN_CACHE_FILE_MODE), 'w') as f:
+            # The mode only applies when the file is created, so a token cache from elsewhere is restricted too
+            os.chmod(token_cache_filename, TOKEN_CACHE_FILE_MODE)
+            json.dump(token_cache, f)
+
+    def write_to_file(self, dictionary, filename):
+        """Write the dictionary to the filename.
+        
+        Keyword arguments:
+        dictionary -- the dictionary to write
+        filename -- the filename
+        """
+        Path(self.args.data_directory).mkdir(exist_ok=True, parents=True)
+        if exists(filename) and not self.should_overwrite(f'\n{filename} already exists. Do you want to overwrite it?'):
+            return
+        with open(filename, 'w') as f:
+            json.dump(dictionary, f)
+
+
+class Progress:
+    """A throttled progress counter for a download or upload loop.
+
+    On a terminal, the counters of all running loops share one line that is redrawn at most every PROGRESS_RENDER_INTERVAL_SECONDS with their rates and ETAs. Otherwise each counter prints a log line every PROGRESS_LOG_INTERVAL_SECONDS. The quiet argument turns both off, leaving the totals.
+    """
+
+    def __init__(self, migrator, label, total=None, count=0):
+        """Create a progress counter and show it.
+
+        Keyword arguments:
+        migrator -- the Migrator whose progress line shows the counter
+        label -- the label of the counter, e.g., 'Subreddits downloaded'
+        total -- the count at which the loop finishes, or None if it isn't known (default None)
+        count -- the count to start from, e.g., the resources a resumed run already has (default 0)
+        """
+        self.count = count
+        self.label = label
+        self.last_log_time = time.monotonic()
+        self.migrator = migrator
+        self.start_count = count
+        self.start_time = time.monotonic()
+        self.total = total
+        with migrator.progress_line['lock']:
+            migrator.progress_line['progresses'].append(self)
+
+    def finish(self):
+        """Stop showing the counter and print its total."""
+        with self.migrator.progress_line['lock']:
+            self.migrator.progress_line['progresses'].remove(self)
+            self.migrator.clear_progress_line()
+            print(f'Total {self.label[0].lower()}{self.label[1:]}:', self.count)
+        self.migrator.render_progress_line(True)
+
+    def get_status(self):
+        """Return the count, rate and ETA of the counter."""
+        elapsed_seconds = time.monotonic() - self.start_time
+        rate = (self.count - self.start_count) / elapsed_seconds if elapsed_seconds else 0
+        status = f'{self.label}: {self.count}' if self.total is None else f'{self.label}: {self.count}/{self.total}'
+        if self.total is not None and rate:
+            return f'{status} ({rate:.1f}/s, ETA {datetime.timedelta(seconds=round((self.total - self.count) / rate))})'
+        return f'{status} ({rate:.1f}/s)'
+
+    def update(self, increment=1):
+        """Add to the count and show it if it's time to.
+
+        Keyword arguments:
+        increment -- the number to add to the count (default 1)
+        """
+        self.count += increment
+        if self.migrator.args.quiet:
+            return
+        if sys.stdout.isatty():
+            self.migrator.render_progress_line()
+        elif time.monotonic() - self.last_log_time >= PROGRESS_LOG_INTERVAL_SECONDS:
+            self.last_log_time = time.monotonic()
+            print(f'[progress] {self.get_status()}')
+
+
+class SharedRateLimiter:
+    """A prawcore rate limiter that several PRAW Reddit instances of the same account share, so that phases running at the same time spend one rate-limit budget.
+
+    The gap between requests is the one prawcore would use for a single instance, but each request reserves its own slot so that concurrent requests don't all go out at once, and no request goes out after the budget is spent until it resets. It has the interface of prawcore's rate limiter without extending it, so that prawcore is only imported once it's needed.
     """
-    print('\nDownloading subreddits from Reddit')
-    subreddits = reddit.user.subreddits(limit=None)
-    subreddits_list = []
-    for subreddit in subreddits:
-        subreddits_list.append({
-            DISPLAY_NAME_KEY: subreddit.display_name,
-            IS_QUARANTINED_KEY: subreddit.quarantine,
-            SUBREDDIT_TYPE_KEY: subreddit.subreddit_type,
-        })
-        print('Subreddits downloaded:', len(subreddits_list))
-    print('Total subreddits downloaded:', len(subreddits_list))
-    return subreddits_list
+
+    def __init__(self, migrator):
+        """Create a rate limiter with an unknown budget.
+
+        Keyword arguments:
+        migrator -- the Migrator whose report records the waits
+        """
+        self.lock = threading.Lock()
+        self.migrator = migrator
+        self.next_request_timestamp = None
+        self.remaining = None
+        self.requests_in_flight = 0
+        self.reset_timestamp = None
+        self.seconds_between_requests = 0
+        self.used = None
+
+    def call(self, request_function, set_header_callback, *args, **kwargs):
+        """Wait for a request slot, make the request and update the budget from its response, as prawcore's rate limiter does.
+
+        Keyword arguments:
+        request_function -- the function that makes the request and returns the response
+        set_header_callback -- the function that returns the headers of the request, called after waiting
+        args -- the arguments of the request function
+        kwargs -- the keyword arguments of the request function
+        """
+        self.delay()
+        kwargs['headers'] = set_header_callback()
+        response_headers = {}
+        try:
+            response = request_function(*args, **kwargs)
+            response_headers = response.headers
+            return response
+        finally:
+            # A failed request is no longer in flight either, even though it has no headers to update the budget from
+            self.update(response_headers)
+
+    def delay(self):
+        """Reserve the next request slot and sleep until it."""
+        with self.lock:
+            now = time.time()
+            request_timestamp = max(self.next_request_timestamp or now, now)
+            if self.remaining is not None:
+                if self.remaining < 1:
+                    # Learn the new budget from the first response after the reset
+                    request_timestamp = max(request_timestamp, self.reset_timestamp)
+                    self.remaining = None
+                else:
+                    self.remaining -= 1
+            self.next_request_timestamp = request_timestamp + self.seconds_between_requests
+            self.requests_in_flight += 1
+        if request_timestamp > now:
+            self.migrator.record_rate_limit_wait(request_timestamp - now)
+            time.sleep(request_timestamp - now)
+
+    def update(self, response_headers):
+        """Update the shared budget from the X-Ratelimit response headers.
+
+        Keyword arguments:
+        response_headers -- the headers of the response
+        """
+        with self.lock:
+            self.requests_in_flight = max(self.requests_in_flight - 1, 0)
+            if 'x-ratelimit-remaining' not in response_headers:
+                return
+            seconds_to_reset = int(response_headers['x-ratelimit-reset'])
+            # The requests still in flight may not be counted in the headers yet, so they come out of the budget too
+            self.remaining = max(float(response_headers['x-ratelimit-remaining']) - self.requests_in_flight, 0)
+            # The reset is rounded down to whole seconds, so wait out the rest of the last one
+            self.reset_timestamp = time.time() + seconds_to_reset + 1
+            self.used = int(response_headers['x-ratelimit-used'])
+            self.seconds_between_requests = max(min((seconds_to_reset - self.remaining) / 2, 10), 0)
 
 
 def exit_script(message=None):
@@ -183,6 +1979,58 @@ def exit_script(message=None):
     sys.exit()
 
 
+def finish_transfer(resources):
+    """Consume what is left of the resources, so that a transfer finishes its download and file even if the upload stopped early.
+    
+    Keyword arguments:
+    resources -- the resources to consume
+    """
+    for _ in resources:
+        pass
+
+
+def get_argument_parser():
+    """Return the parser of the command line arguments, whose defaults are also the defaults of the Migrator options."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--concurrency', default=DEFAULT_CONCURRENCY, type=int, help=f'The maximum number of download phases or saved resource uploads to run at the same time, where 1 runs them one after another (default {DEFAULT_CONCURRENCY})')
+    parser.add_argument('-co', '--compression', choices=sorted(COMPRESSION_EXTENSIONS), default=NO_COMPRESSION, help=f'The compression of JSON and JSON Lines archives, where {ZSTD_COMPRESSION} needs the zstandard package (default {NO_COMPRESSION})')
+    parser.add_argument('-cv', '--convert', action='store_true', help='Convert the JSON files in the data directory to archives in the format and compression arguments')
+    parser.add_argument('-d', '--download', action='store_true', help='Download resources from Reddit and save the resources to files in the data directory')
+    parser.add_argument('-dd', '--data-directory', default=DATA_DIRECTORY_NAME, help=f'The directory of the archives, journal, caches and other files of the run (default {DATA_DIRECTORY_NAME})')
+    parser.add_argument('-f', '--format', choices=[JSON_FORMAT, JSONL_FORMAT, SQLITE_FORMAT], default=JSON_FORMAT, help=f'The format of the archives that downloads write and uploads read, where {SQLITE_FORMAT} keeps every resource type in one database file (default {JSON_FORMAT})')
+    parser.add_argument('-in', '--incremental', action='store_true', help='Only download the changes since the last download and update the archives with them, recording what was added, changed and removed')
+    parser.add_argument('-ir', '--include-remindmebot-reminders', action='store_true', help='Include remindmebot reminder operations (to do)')
+    parser.add_argument('-is', '--include-saved-resources', action='store_true', help='Include saved resource operations')
+    parser.add_argument('-mm', '--merge-multireddits', action='store_true', help='Add the missing subreddits to multireddits that already exist instead of skipping them')
+    parser.add_argument('-o', '--overwrite', action='store_true', help='Overwrite data (local data or Reddit data) without confirming')
+    parser.add_argument('-p', '--plan', action='store_true', help='Print the requests and write calls that the upload would make and about how long it would take, without writing to Reddit')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only print the total of each download and upload instead of their progress')
+    parser.add_argument('-r', '--resume', action='store_true', help='Resume the last run, skipping the work that its journal in the data directory already recorded')
+    parser.add_argument('-re', '--report', help='Write a JSON report of every request and of where the time of each phase went (network, rate-limit waiting, local work) to this filename, e.g., data/report.json')
+    parser.add_argument('-rt', '--remindmebot-timeout', default=REMINDMEBOT_REPLY_TIMEOUT_SECONDS, type=int, help=f'The maximum number of seconds to wait for RemindMeBot to reply with the current reminders (default {REMINDMEBOT_REPLY_TIMEOUT_SECONDS})')
+    parser.add_argument('-sb', '--skip-blocked-users', action='store_true', help='Skip blocked user operations')
+    parser.add_argument('-sm', '--skip-multireddits', action='store_true', help='Skip multireddit operations')
+    parser.add_argument('-ss', '--skip-subreddits', action='store_true', help='Skip subreddit operations')
+    parser.add_argument('-st', '--stream', action='store_true', help='With --download and --upload, upload blocked users, multireddits and subreddits while they are downloaded instead of after the download finishes')
+    parser.add_argument('-sy', '--sync', action='store_true', help='Upload only the resources that the Reddit account is missing, comparing against its current data first')
+    parser.add_argument('-u', '--upload', action='store_true', help='Upload resources from the files in the data directory to Reddit')
+    return parser
+
+
+def get_batches(resources, batch_size):
+    """Yield lists of up to batch_size resources from the resources.
+    
+    Keyword arguments:
+    resources -- the resources to split into batches, in any iterable
+    batch_size -- the maximum number of resources in a batch
+    """
+    resources = iter(resources)
+    batch = list(islice(resources, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(resources, batch_size))
+
+
 def get_account_credentials(message):
     """Prompt the user to enter their Reddit account credentials and return them.
     
@@ -201,18 +2049,64 @@ def get_account_credentials(message):
     return (password, username)
 
 
-def get_dictionary(key, resources):
-    """Return a new dictionary using the given key and resources (key value).
-
+def get_access_token(reddit):
+    """Return the access token of the PRAW Reddit instance with its expiration timestamp and scopes, or None if it doesn't have a valid one.
+    
     Keyword arguments:
-    key -- the key to use in the dictionary
-    resources -- the resources to use as the key value
+    reddit -- the PRAW Reddit instance
     """
+    authorizer = reddit._core._authorizer
+    if not authorizer.is_valid():
+        return None
     return {
-        key: resources,
+        'accessToken': authorizer.access_token,
+        'expirationTimestamp': authorizer._expiration_timestamp,
+        'scopes': sorted(authorizer.scopes),
     }
 
 
+def get_account_key(reddit):
+    """Return the key of the Reddit account and app of the PRAW Reddit instance in the token cache.
+    
+    Keyword arguments:
+    reddit -- the PRAW Reddit instance
+    """
+    return f'{reddit.config.client_id}/{reddit.config.username.lower()}'
+
+
+def get_existing_fullnames_from_reddit(reddit, fullnames):
+    """Check the fullnames with Reddit in batches of 100 and return the ones of comments and submissions that still exist and haven't been deleted or removed.
+
+    Removed link submissions have no text to check, so they're recognised by their removed_by_category instead.
+    
+    Keyword arguments:
+    reddit -- the PRAW Reddit instance
+    fullnames -- the fullnames to check
+    """
+    from praw.models import Comment
+    if not fullnames:
+        return set()
+    print(f'Checking {len(fullnames)} saved resources with Reddit')
+    existing_fullnames = set()
+    for thing in reddit.info(fullnames=fullnames):
+        thing_data = get_listing_data(thing)
+        text = thing_data.get('body') if isinstance(thing, Comment) else thing_data.get('selftext')
+        if text not in DELETED_TEXTS and not thing_data.get('removed_by_category'):
+            existing_fullnames.add(thing.fullname)
+    return existing_fullnames
+
+
+def get_existing_multireddits_from_reddit(reddit):
+    """Return the multireddits that the Reddit account already has, keyed by lowercase display name.
+
+    The multireddits come from a single listing request that includes their subreddit names, so nothing else is fetched.
+    
+    Keyword arguments:
+    reddit -- the PRAW Reddit instance
+    """
+    return {multireddit.display_name.lower(): multireddit for multireddit in reddit.user.multireddits()}
+
+
 def get_from_file(filename, key):
     """Get the resource from the filename and return it.
     
@@ -221,13 +2115,54 @@ def get_from_file(filename, key):
     key -- the key of the resource
     """
     if not exists(filename):
-        exit_script(f"Error: {filename} doesn't exist. Exiting.")
-    with open(filename) as f:
+        raise FileNotFoundError(f"{filename} doesn't exist")
+    with open_archive_file(filename, 'r') as f:
         dictionary = json.load(f)
         resource = dictionary[key]
         return resource
 
 
+def get_incremental_resource_name(key, resource):
+    """Return the name that identifies the resource between incremental downloads, and in the sync comparison with the upload account.
+    
+    Keyword arguments:
+    key -- the key of the resource
+    resource -- the blocked user name, or the resource dictionary
+    """
+    return get_saved_resource_fullname(resource) if key == SAVED_RESOURCES_KEY else get_resource_name(resource)
+
+
+def get_listing_data(praw_model):
+    """Return the data that Reddit sent for the PRAW model, e.g., in a listing or an info response.
+
+    Accessing an attribute that the data doesn't have makes PRAW fetch the whole resource, a request per model, so optional attributes are read from the data instead.
+
+    Keyword arguments:
+    praw_model -- the PRAW model, e.g., a Comment, Submission or Subreddit
+    """
+    return vars(praw_model)
+
+
+def get_listing_params(cursor):
+    """Return the listing parameters that continue a listing after the cursor.
+
+    Keyword arguments:
+    cursor -- the fullname of the last item that was downloaded, or None to start from the beginning
+    """
+    return {'after': cursor} if cursor else None
+
+
+def get_missing_subreddit_names(existing_multireddit, multireddit):
+    """Return the names of the subreddits of the multireddit that the existing multireddit on Reddit is missing.
+    
+    Keyword arguments:
+    existing_multireddit -- the PRAW Multireddit instance of the existing multireddit
+    multireddit -- the multireddit dictionary
+    """
+    existing_subreddit_names = {str(subreddit).lower() for subreddit in existing_multireddit.subreddits}
+    return [subreddit_name for subreddit_name in multireddit[SUBREDDITS_KEY] if subreddit_name.lower() not in existing_subreddit_names]
+
+
 def get_password():
     """Prompt the user to enter their Reddit account password and return it."""
     print('Password\n> ', end='')
@@ -237,253 +2172,114 @@ def get_password():
     return (confirm_password, password)
 
 
-def get_reddit(account_credentials, client_id, client_secret, message):
-    """Get the PRAW Reddit instance, allowing the user to enter their Reddit account credentials again if authentication fails.
+def get_remindmebot_reminder_message(remindmebot_reminder):
+    """Return the message that asks RemindMeBot for the remindmebot reminder.
     
     Keyword arguments:
-    account_credentials -- the Reddit account credentials
-    client_id -- the client ID for the Reddit app
-    client_secret -- the client secret for the Reddit app
-    message -- the message to prompt the user with if authentication fails
+    remindmebot_reminder -- the remindmebot reminder dictionary
     """
-    while True:
-        try:
-            reddit = praw.Reddit(
-                client_id=client_id,
-                client_secret=client_secret,
-                password=account_credentials[0],
-                user_agent=USER_AGENT,
-                username=account_credentials[1],
-            )
-            reddit.user.me()
-            return reddit
-        except prawcore.OAuthException:
-            print('\nError: Authentication failed. Would you like to try entering your Reddit account credentials again? (y/n)')
-            user_input = input('> ')
-            if user_input == 'n':
-                exit_script()
-            account_credentials = get_account_credentials(message)
+    return f'RemindMe! {remindmebot_reminder[DATETIME_KEY]} "{remindmebot_reminder[SOURCE_KEY]}"'
 
 
-def print_message_prepend_newline(message, should_prepend_newline=True):
-    """Print a message prepended by a newline.
+def get_resource_name(resource):
+    """Return the name that identifies the resource on Reddit, or None if the resource doesn't have one.
     
     Keyword arguments:
-    message -- the message to print
-    should_prepend_newline -- whether or not to prepend the message with a newline (default True)
+    resource -- the blocked user name, or the resource dictionary
     """
-    message = f'\n{message}' if should_prepend_newline else message
-    print(message)
+    return resource if isinstance(resource, str) else resource.get(DISPLAY_NAME_KEY)
 
 
-def should_overwrite(message='\nDo you want to upload this data to your Reddit account?', reddit=None):
-    """Return whether or not the resource should be overwritten.
+def get_saved_resource_fullname(saved_resource):
+    """Return the fullname of the saved resource, working it out from the permalink for saved resources downloaded before fullnames were recorded.
     
     Keyword arguments:
-    message -- the message to prompt the user with (default Reddit overwrite message string)
-    reddit -- the PRAW Reddit instance (default None)
+    saved_resource -- the saved resource dictionary
     """
-    if not args.overwrite:
-        print(message)
-        if reddit:
-            print('Reddit account:', reddit.user.me().name)
-        user_input = input('(y/n)\n> ')
-        return user_input == 'y'
-    return True
+    if FULLNAME_KEY in saved_resource:
+        return saved_resource[FULLNAME_KEY]
+    # Permalinks look like /r/{subreddit}/comments/{submission ID}/{slug}/{comment ID}/
+    permalink_segments = saved_resource['permalink'].strip('/').split('/')
+    if saved_resource['savedResourceType'] == 'comment':
+        return f'{COMMENT_FULLNAME_PREFIX}{permalink_segments[5]}'
+    return f'{SUBMISSION_FULLNAME_PREFIX}{permalink_segments[3]}'
 
 
-def upload_blocked_users_to_reddit(blocked_users, reddit):
-    """Upload blocked users to Reddit.
+def get_resource_count(resources):
+    """Return the number of resources, or None if they're in an iterable that can't be counted up front.
     
     Keyword arguments:
-    blocked_users -- the blocked users to upload to Reddit
-    reddit -- the PRAW Reddit instance
+    resources -- the resources
     """
-    print('\nUploading blocked users to Reddit')
-    if not should_overwrite(reddit=reddit):
-        return
-    blocked_users_uploaded_count = 0
-    for blocked_user in blocked_users:
-        reddit.redditor(blocked_user).block()
-        blocked_users_uploaded_count += 1
-        print('Blocked users uploaded:', blocked_users_uploaded_count)
-    print('Total blocked users uploaded:', blocked_users_uploaded_count)
-
-
-def upload_multireddits_to_reddit(multireddits, reddit):
-    """Upload multireddits to Reddit, skipping any multireddit that already exists.
+    return len(resources) if isinstance(resources, list) else None
+
+
+def get_submission_titles_from_reddit(reddit, submission_ids):
+    """Get the titles of the submissions from Reddit in batches of 100 and return them keyed by submission ID.
+
+    Submissions that no longer exist are left out.
     
     Keyword arguments:
-    multireddits -- the multireddits to upload to Reddit
     reddit -- the PRAW Reddit instance
+    submission_ids -- the IDs of the submissions
     """
-    print('\nUploading multireddits to Reddit')
-    print('Downloading existing multireddits to prevent collisions')
-    existing_multireddits = download_multireddits_from_reddit(reddit, False)
-    existing_multireddits = [existing_multireddit[DISPLAY_NAME_KEY] for existing_multireddit in existing_multireddits]
-    if not should_overwrite(reddit=reddit):
-        return
-    multireddits_uploaded_count = 0
-    for multireddit in multireddits:
-        if multireddit[DISPLAY_NAME_KEY] in existing_multireddits:
-            print(f'Skipping multireddit {multireddit[DISPLAY_NAME_KEY]} as it already exists')
-            skipped_resources[MULTIREDDITS_KEY].append(multireddit)
-            continue
-        reddit.multireddit.create(multireddit[DISPLAY_NAME_KEY], multireddit[SUBREDDITS_KEY], visibility=multireddit[VISIBILITY_KEY])
-        multireddits_uploaded_count += 1
-        print('Multireddits uploaded:', multireddits_uploaded_count)
-    print('Total multireddits uploaded:', multireddits_uploaded_count)
-
-
-def upload_remindmebot_reminders_to_reddit(reddit, remindmebot_reminders):
-    """Upload remindmebot reminders to Reddit.
+    if not submission_ids:
+        return {}
+    print(f'Getting the titles of {len(submission_ids)} submissions from Reddit')
+    submissions = reddit.info(fullnames=[f'{SUBMISSION_FULLNAME_PREFIX}{submission_id}' for submission_id in submission_ids])
+    return {submission.id: submission.title for submission in submissions}
+
+
+def main():
+    """Run the migration that the command line arguments ask for with the config.py file."""
+    args = get_argument_parser().parse_args()
+    # config.py is only needed by the command line, as a Migrator can be given any object with its variables
+    import config
+    try:
+        Migrator(config, is_interactive=True, **vars(args)).run()
+    except (FileNotFoundError, ValueError) as exception:
+        exit_script(f'Error: {exception}. Exiting.')
+
+
+def open_archive_file(filename, mode):
+    """Open the archive file in text mode, compressing or decompressing it based on its extension, and return the file object.
     
     Keyword arguments:
-    reddit -- the PRAW Reddit instance
-    remindmebot_reminders -- the remindmebot reminders to upload to Reddit
+    filename -- the filename of the archive file
+    mode -- the mode to open the file in ('r' or 'w')
     """
-    print('\nUploading remindmebot reminders to Reddit')
-    if not should_overwrite(reddit=reddit):
-        return
-    remindmebot_reminders_uploaded_count = 0
-    error_encountered = False
-    for remindmebot_reminder in [remindmebot_reminders[0]]:
-        try:
-            reddit.redditor(REMINDMEBOT_USERNAME).message(REMINDMEBOT_MESSAGE_SUBJECT, f'RemindMe! {remindmebot_reminder[DATETIME_KEY]} "{remindmebot_reminder[SOURCE_KEY]}"')
-            remindmebot_reminders_uploaded_count += 1
-        except praw.exceptions.RedditAPIException as exception:
-            error_encountered = True
-            skipped_resources[REMINDMEBOT_REMINDERS_KEY].append(remindmebot_reminder)
-            for subexception in exception.items:
-                print(f'\nException: {subexception.error_type}')
-            print("\nError: RedditAPIException. If the error above is about RESTRICTED_TO_PM, it's possible your Reddit account is too new to send messages to other users. Please try this function again when your Reddit account has higher karma.")
-        print_message_prepend_newline(f'Remindmebot reminders uploaded: {remindmebot_reminders_uploaded_count}', error_encountered)
-    print('Total remindmebot reminders uploaded:', remindmebot_reminders_uploaded_count)
-
-
-def upload_subreddits_to_reddit(reddit, subreddits):
-    """Upload subreddits to Reddit, skipping subreddits that are private or quarantined.
+    if filename.endswith(COMPRESSION_EXTENSIONS[GZIP_COMPRESSION]):
+        return gzip.open(filename, f'{mode}t')
+    if filename.endswith(COMPRESSION_EXTENSIONS[ZSTD_COMPRESSION]):
+        # zstandard is optional, and is checked for when the zstd compression argument is given
+        import zstandard
+        return zstandard.open(filename, f'{mode}t')
+    return open(filename, mode)
+
+
+def print_message_prepend_newline(message, should_prepend_newline=True):
+    """Print a message prepended by a newline.
     
     Keyword arguments:
-    reddit -- the PRAW Reddit instance
-    subreddits -- the subreddits to upload to Reddit
+    message -- the message to print
+    should_prepend_newline -- whether or not to prepend the message with a newline (default True)
     """
-    print('\nUploading subreddits to Reddit')
-    if not should_overwrite(reddit=reddit):
-        return
-    subreddit_model_list = []
-    for subreddit in subreddits:
-        if subreddit[IS_QUARANTINED_KEY]:
-            print(f"Skipping subreddit {subreddit[DISPLAY_NAME_KEY]} as it's quarantined")
-        elif subreddit[SUBREDDIT_TYPE_KEY] != 'private':
-            subreddit_model_list.append(reddit.subreddit(subreddit[DISPLAY_NAME_KEY]))
-            continue
-        else:
-            print(f"Skipping subreddit {subreddit[DISPLAY_NAME_KEY]} as it's private")
-        skipped_resources[SUBREDDITS_KEY].append(subreddit)
-    batched_subreddit_model_list = []
-    subreddit_model_batch = []
-    for subreddit_model in subreddit_model_list:
-        subreddit_model_batch.append(subreddit_model)
-        if len(subreddit_model_batch) == 1000:
-            batched_subreddit_model_list.append(subreddit_model_batch)
-            subreddit_model_batch = []
-    if subreddit_model_batch:
-        batched_subreddit_model_list.append(subreddit_model_batch)
-    subreddits_uploaded_count = 0
-    for subreddit_model_batch in batched_subreddit_model_list:
-        reddit.subreddit(subreddit_model_batch[0].display_name).subscribe(other_subreddits=subreddit_model_batch[1:])
-        subreddits_uploaded_count += len(subreddit_model_batch)
-        print('Subreddits uploaded:', subreddits_uploaded_count)
-        time.sleep(10)
-    print('Total subreddits uploaded:', subreddits_uploaded_count)
-
-
-def write_skipped_resources_to_file():
-    """Write skipped resources to file."""
-    write_to_file(skipped_resources, SKIPPED_RESOURCES_FILENAME)
-    print(f'Skipped resources were written to {SKIPPED_RESOURCES_FILENAME}')
-
-
-def write_to_file(dictionary, filename):
-    """Write the dictionary to the filename.
+    message = f'\n{message}' if should_prepend_newline else message
+    print(message)
+
+
+def set_access_token(reddit, access_token):
+    """Give the PRAW Reddit instance an access token, so that it doesn't authenticate until the access token expires.
     
     Keyword arguments:
-    dictionary -- the dictionary to write
-    filename -- the filename
+    reddit -- the PRAW Reddit instance
+    access_token -- the access token with its expiration timestamp and scopes, from get_access_token
     """
-    Path(DATA_DIRECTORY_NAME).mkdir(exist_ok=True, parents=True)
-    if exists(filename) and not should_overwrite(f'\n{filename} already exists. Do you want to overwrite it?'):
-        return
-    with open(filename, 'w') as f:
-        json.dump(dictionary, f)
-
-
-parser = argparse.ArgumentParser()
-parser.add_argument('-d', '--download', action='store_true', help='Download resources from Reddit and save the resources to files in the data directory')
-parser.add_argument('-ir', '--include-remindmebot-reminders', action='store_true', help='Include remindmebot reminder operations (to do)')
-parser.add_argument('-is', '--include-saved-resources', action='store_true', help='Include saved resource operations (to do)')
-parser.add_argument('-o', '--overwrite', action='store_true', help='Overwrite data (local data or Reddit data) without confirming')
-parser.add_argument('-sb', '--skip-blocked-users', action='store_true', help='Skip blocked user operations')
-parser.add_argument('-sm', '--skip-multireddits', action='store_true', help='Skip multireddit operations')
-parser.add_argument('-ss', '--skip-subreddits', action='store_true', help='Skip subreddit operations')
-parser.add_argument('-u', '--upload', action='store_true', help='Upload resources from the files in the data directory to Reddit')
-args = parser.parse_args()
-
-skipped_resources = {
-    MULTIREDDITS_KEY: [],
-    REMINDMEBOT_REMINDERS_KEY: [],
-    SUBREDDITS_KEY: [],
-}
+    authorizer = reddit._core._authorizer
+    authorizer.access_token = access_token['accessToken']
+    authorizer._expiration_timestamp = access_token['expirationTimestamp']
+    authorizer.scopes = set(access_token['scopes'])
 
-if args.download:
-    print('Downloading data from Reddit')
-    account_credentials = None
-    if hasattr(config, DOWNLOAD_PASSWORD_VARIABLE_NAME) and config.DOWNLOAD_PASSWORD and hasattr(config, DOWNLOAD_USERNAME_VARIABLE_NAME) and config.DOWNLOAD_USERNAME:
-        print(FOUND_ACCOUNT_CREDENTIALS_MESSAGE)
-        account_credentials = (config.DOWNLOAD_PASSWORD, config.DOWNLOAD_USERNAME)
-    else:
-        account_credentials = get_account_credentials(GET_ACCOUNT_CREDENTIALS_MESSAGE_DOWNLOAD)
-    reddit = get_reddit(account_credentials, config.DOWNLOAD_CLIENT_ID, config.DOWNLOAD_CLIENT_SECRET, GET_ACCOUNT_CREDENTIALS_MESSAGE_DOWNLOAD)
-    if args.include_remindmebot_reminders:
-        remindmebot_reminders = download_remindmebot_reminders_from_reddit(reddit)
-        write_to_file(get_dictionary(REMINDMEBOT_REMINDERS_KEY, remindmebot_reminders), REMINDMEBOT_REMINDERS_FILENAME)
-    if args.include_saved_resources:
-        saved_resources = download_saved_resources_from_reddit(reddit)
-        write_to_file(get_dictionary(SAVED_RESOURCES_KEY, saved_resources), SAVED_RESOURCES_FILENAME)
-    if not args.skip_blocked_users:
-        blocked_users = download_blocked_users_from_reddit(reddit)
-        write_to_file(get_dictionary(BLOCKED_USERS_KEY, blocked_users), BLOCKED_USERS_FILENAME)
-    if not args.skip_multireddits:
-        multireddits = download_multireddits_from_reddit(reddit)
-        write_to_file(get_dictionary(MULTIREDDITS_KEY, multireddits), MULTIREDDITS_FILENAME)
-    if not args.skip_subreddits:
-        subreddits = download_subreddits_from_reddit(reddit)
-        write_to_file(get_dictionary(SUBREDDITS_KEY, subreddits), SUBREDDITS_FILENAME)
-
-if args.upload:
-    print_message_prepend_newline('Uploading data to Reddit', args.download)
-    account_credentials = None
-    if hasattr(config, UPLOAD_PASSWORD_VARIABLE_NAME) and config.UPLOAD_PASSWORD and hasattr(config, UPLOAD_USERNAME_VARIABLE_NAME) and config.UPLOAD_USERNAME:
-        print(FOUND_ACCOUNT_CREDENTIALS_MESSAGE)
-        account_credentials = (config.UPLOAD_PASSWORD, config.UPLOAD_USERNAME)
-    else:
-        account_credentials = get_account_credentials(GET_ACCOUNT_CREDENTIALS_MESSAGE_UPLOAD)
-    reddit = get_reddit(account_credentials, config.UPLOAD_CLIENT_ID, config.UPLOAD_CLIENT_SECRET, GET_ACCOUNT_CREDENTIALS_MESSAGE_UPLOAD)
-    if args.include_remindmebot_reminders:
-        remindmebot_reminders = get_from_file(REMINDMEBOT_REMINDERS_FILENAME, REMINDMEBOT_REMINDERS_KEY)
-        upload_remindmebot_reminders_to_reddit(reddit, remindmebot_reminders)
-    # To do
-    # if args.include_saved_resources:
-    #     saved_resources = get_from_file(SAVED_RESOURCES_FILENAME, SAVED_RESOURCES_KEY)
-    #     upload_saved_resources_to_reddit(reddit, saved_resources)
-    if not args.skip_blocked_users:
-        blocked_users = get_from_file(BLOCKED_USERS_FILENAME, BLOCKED_USERS_KEY)
-        upload_blocked_users_to_reddit(blocked_users, reddit)
-    if not args.skip_multireddits:
-        multireddits = get_from_file(MULTIREDDITS_FILENAME, MULTIREDDITS_KEY)
-        upload_multireddits_to_reddit(multireddits, reddit)
-    if not args.skip_subreddits:
-        subreddits = get_from_file(SUBREDDITS_FILENAME, SUBREDDITS_KEY)
-        upload_subreddits_to_reddit(reddit, subreddits)
-    write_skipped_resources_to_file()
\ No newline at end of file
+
+if __name__ == '__main__':
+    main()